@@ -0,0 +1,84 @@
+"""Incremental vs full delay propagation on large synthetic dependency DAGs.
+
+Each graph links every project to a few upstream projects among its
+`--window` predecessors in a hidden schedule, with partial pass-through
+(weight) and slack. Nodes and edges arrive in shuffled order; the graph
+is bulk-loaded with add_edges. For each size it reports:
+
+  full      - recompute_all() over the whole graph
+  update    - set_local() on a random project (re-evaluates downstream only)
+  add_edge  - inserting a random new dependency (Pearce-Kelly reorder + propagation)
+
+with the mean number of nodes re-evaluated per incremental change.
+
+Run from the repo root:
+
+    python -m api.benchmarks.bench_dependency [--sizes 1000 10000 100000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from api.services.dependency import CycleError, DependencyGraph
+
+
+def build(n: int, fan_in: int, window: int, rng: random.Random) -> DependencyGraph:
+    ids = [f"P{i}" for i in range(n)]
+    rng.shuffle(ids)  # ids[i] is the i-th project in the hidden schedule
+    g = DependencyGraph()
+    for i in rng.sample(range(n), n):
+        g.set_local(ids[i], rng.uniform(0, 6), rng.uniform(0, 30))
+    edges = []
+    for i in range(1, n):
+        for j in rng.sample(range(max(0, i - window), i), min(fan_in, i)):
+            edges.append((ids[j], ids[i]))
+    rng.shuffle(edges)
+    g.add_edges((u, v, rng.uniform(0.3, 0.9), rng.uniform(0, 3)) for u, v in edges)
+    return g
+
+
+def _timed(fn, reps: int):
+    times, touched = [], []
+    for _ in range(reps):
+        t = time.perf_counter()
+        touched.append(fn())
+        times.append(time.perf_counter() - t)
+    return statistics.mean(times) * 1000.0, statistics.mean(touched)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--fan-in", type=int, default=2)
+    ap.add_argument("--window", type=int, default=50)
+    ap.add_argument("--reps", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'nodes':>8} {'edges':>8} {'build s':>8} {'full ms':>9} {'update ms':>10} {'touched':>8} {'add_edge ms':>12} {'touched':>8}")
+    for n in args.sizes:
+        rng = random.Random(args.seed)
+        t = time.perf_counter()
+        g = build(n, args.fan_in, args.window, rng)
+        build_s = time.perf_counter() - t
+        full_ms, _ = _timed(g.recompute_all, 3)
+        nodes = g.topological_order()
+
+        def update():
+            return g.set_local(rng.choice(nodes), rng.uniform(0, 6), rng.uniform(0, 30))
+
+        def add_edge():
+            u, v = rng.sample(nodes, 2)
+            try:
+                return g.add_edge(u, v, weight=rng.uniform(0.3, 0.9), slack_months=rng.uniform(0, 3))
+            except CycleError:
+                return 0
+
+        upd_ms, upd_touched = _timed(update, args.reps)
+        edge_ms, edge_touched = _timed(add_edge, args.reps)
+        print(f"{n:>8} {g.edges:>8} {build_s:>8.2f} {full_ms:>9.2f} {upd_ms:>10.3f} {upd_touched:>8.1f} {edge_ms:>12.3f} {edge_touched:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
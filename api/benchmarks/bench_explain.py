@@ -0,0 +1,59 @@
+"""Latency and agreement of the /predict explanation modes.
+
+Scores synthetic feature rows with the demo model in each mode (cache
+bypassed) and compares every mode's contributions with `full`
+(shap.TreeExplainer): max absolute difference and how often the top-2
+drivers in the explanation string match.
+
+Run from the repo root:
+
+    python -m api.benchmarks.bench_explain [--rows 1 100 10000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from api import main as api
+
+MODES = ["none", "top_k", "approx", "full"]
+
+
+def _time(fn, repeat: int) -> float:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(11)
+    print(f"{'rows':>6} " + " ".join(f"{m + ' ms':>11}" for m in MODES))
+    for n in args.rows:
+        x = rng.uniform(0, 1, (n, len(api.FEATURE_KEYS))).astype(np.float32)
+        cols = [1000 * _time(lambda: api._score_rows(x, m), args.repeat) for m in MODES]
+        print(f"{n:>6} " + " ".join(f"{c:>11.2f}" for c in cols))
+
+    x = rng.uniform(0, 1, (max(args.rows), len(api.FEATURE_KEYS))).astype(np.float32)
+    ref = api._explain(x, "full")
+    ref_top = np.argsort(-np.abs(ref), axis=1, kind="stable")[:, :2]
+    print(f"\nagreement with full over {len(x)} rows")
+    print(f"{'mode':<8} {'max |diff|':>11} {'top-2 match':>12}")
+    for m in ("top_k", "approx"):
+        vals = api._explain(x, m)
+        top = np.argsort(-np.abs(vals), axis=1, kind="stable")[:, :2]
+        match = float(np.mean(np.all(top == ref_top, axis=1)))
+        print(f"{m:<8} {float(np.max(np.abs(vals - ref))):>11.2e} {match:>12.1%}")
+
+
+if __name__ == "__main__":
+    main()
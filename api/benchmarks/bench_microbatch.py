@@ -0,0 +1,76 @@
+"""Load test: micro-batched /predict vs one threadpool call per request.
+
+Fires N /predict requests with C in flight at a time against the app
+in-process (httpx + ASGI transport, no network) and reports throughput and
+latency percentiles for both paths. The prediction cache is disabled so
+every request reaches the model.
+
+Run from the repo root:
+
+    python -m api.benchmarks.bench_microbatch [--requests 2000] [--concurrency 64]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ["PREDICT_CACHE_SIZE"] = "0"
+
+import httpx
+import numpy as np
+
+from api import main as api
+from api.services.batcher import MicroBatcher
+
+
+async def _load(n: int, concurrency: int, payloads: list) -> tuple:
+    transport = httpx.ASGITransport(app=api.app)
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with sem:
+                t = time.perf_counter()
+                r = await client.post("/predict", json=payloads[i % len(payloads)])
+                latencies.append(time.perf_counter() - t)
+                r.raise_for_status()
+
+        await one(0)  # warm-up (model load, first SHAP call)
+        latencies.clear()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        wall = time.perf_counter() - t0
+    return wall, np.asarray(latencies) * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(7)
+    payloads = [
+        {"features": dict(zip(api.FEATURE_KEYS, row))}
+        for row in rng.uniform(0, 1, (args.requests, len(api.FEATURE_KEYS))).tolist()
+    ]
+
+    modes = {
+        "per-request": None,
+        "micro-batch": MicroBatcher(api._score_requests, args.max_batch, args.max_wait_ms),
+    }
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'mode':<12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, batcher in modes.items():
+        api.PREDICT_BATCHER = batcher
+        wall, lat = asyncio.run(_load(args.requests, args.concurrency, payloads))
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        print(f"{name:<12} {args.requests / wall:>8.0f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+        if batcher is not None:
+            print(f"{'':<12} batches={batcher.batches} mean_batch={batcher.stats()['mean_batch']}")
+
+
+if __name__ == "__main__":
+    main()
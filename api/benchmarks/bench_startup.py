@@ -0,0 +1,70 @@
+"""Time-to-first-request for a fresh API process.
+
+Each scenario runs in its own interpreter so import caches don't leak:
+
+  eager - empty registry, model + explainer built before the app can serve
+          (the old import-time `_train_demo_model()` behaviour)
+  cold  - empty registry, lazy: /health answers at once, the first
+          /predict waits for training + saving
+  warm  - registry already populated: the worker only loads artifacts
+
+Run from the repo root:
+
+    python -m api.benchmarks.bench_startup [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_CHILD = r"""
+import json, os, time
+t0 = time.perf_counter()
+from fastapi.testclient import TestClient
+from api.main import app
+if os.environ.get("BENCH_EAGER"):
+    from api.services.model_store import get_artifacts
+    get_artifacts().explainer
+t_import = time.perf_counter() - t0
+with TestClient(app) as c:
+    c.get("/health")
+    t_health = time.perf_counter() - t0
+    c.post("/predict", json={"features": {"labour_cost": 0.4, "material_cost": 0.6}})
+    t_predict = time.perf_counter() - t0
+print(json.dumps({"import": t_import, "health": t_health, "predict": t_predict}))
+"""
+
+
+def _run(registry: str, eager: bool = False) -> dict:
+    env = dict(os.environ, MODEL_REGISTRY_PATH=registry)
+    if eager:
+        env["BENCH_EAGER"] = "1"
+    out = subprocess.run([sys.executable, "-c", _CHILD], env=env, check=True,
+                         capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    results = {"eager": [], "cold": [], "warm": []}
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as reg:
+            results["eager"].append(_run(reg, eager=True))
+        with tempfile.TemporaryDirectory() as reg:
+            results["cold"].append(_run(reg))
+            results["warm"].append(_run(reg))
+
+    print(f"{'scenario':<8} {'import s':>9} {'/health s':>10} {'/predict s':>11}")
+    for name, rows in results.items():
+        med = {k: statistics.median(r[k] for r in rows) for k in rows[0]}
+        print(f"{name:<8} {med['import']:>9.3f} {med['health']:>10.3f} {med['predict']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
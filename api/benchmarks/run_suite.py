@@ -0,0 +1,174 @@
+"""In-process benchmark suite for /predict, /what-if and /projects.
+
+Runs the app through httpx's ASGI transport (no network) against a fresh
+SQLite portfolio of synthetic projects, with a fixed RNG seed so runs are
+comparable. Each case is warmed up once and then timed sequentially.
+
+Run from the repo root:
+
+    python -m api.benchmarks.run_suite [--projects 5000] [--iterations 200]
+    python -m api.benchmarks.run_suite --json bench.json          # save results
+    python -m api.benchmarks.run_suite --baseline bench.json      # fail on p50 regressions
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="prism-bench-")
+os.environ["PROJECTS_BACKEND"] = "sql"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+import httpx
+import numpy as np
+
+from api import main as api
+
+
+def synthetic_portfolio(n: int, seed: int = 42) -> list:
+    rng = np.random.default_rng(seed)
+    risks = ["Low", "Medium", "High"]
+    statuses = ["Planned", "In Progress", "Delayed", "Completed"]
+    lat = rng.uniform(8.0, 34.0, n)
+    lng = rng.uniform(69.0, 95.0, n)
+    budget = rng.lognormal(3.0, 0.8, n)
+    delay = rng.gamma(2.0, 2.0, n)
+    return [
+        {
+            "user_id": f"user-{i % 50}",
+            "code": f"PRJ-{i:06d}",
+            "name": f"Synthetic project {i}",
+            "location_lat": float(lat[i]),
+            "location_lng": float(lng[i]),
+            "budget_cr": round(float(budget[i]), 2),
+            "status": statuses[i % len(statuses)],
+            "risk": risks[int(rng.integers(0, 3))],
+            "delay_months": round(float(delay[i]), 2),
+        }
+        for i in range(n)
+    ]
+
+
+def _features(rng) -> dict:
+    return dict(zip(api.FEATURE_KEYS, rng.uniform(0, 1, len(api.FEATURE_KEYS)).tolist()))
+
+
+def _cases(rng) -> dict:
+    hot = _features(rng)
+
+    def predict_cold(c):
+        return c.post("/predict", json={"features": _features(rng)})
+
+    def predict_hot(c):
+        return c.post("/predict", json={"features": hot})
+
+    def predict_approx(c):
+        return c.post("/predict", json={"features": _features(rng), "explain": "approx"})
+
+    def predict_batch_1k(c):
+        return c.post("/predict/batch", json={"items": [{"features": _features(rng)} for _ in range(1000)], "explain": "none"})
+
+    def what_if(c):
+        return c.post("/what-if", json={"features": _features(rng)})
+
+    def what_if_sweep(c):
+        return c.post("/what-if/sweep", json={
+            "features": _features(rng),
+            "axes": [{"feature": "material_cost", "steps": 20}, {"feature": "regulatory_delay", "steps": 20}],
+        })
+
+    def projects_page(c):
+        api.PROJECTS_CACHE.invalidate()
+        return c.get("/projects", params={"limit": 100, "after_id": int(rng.integers(0, 4000))})
+
+    def projects_page_cached(c):
+        return c.get("/projects", params={"limit": 100})
+
+    def projects_all(c):
+        api.PROJECTS_CACHE.invalidate()
+        return c.get("/projects")
+
+    def projects_export(c):
+        return c.get("/projects/export", params={"fields": "code,risk"})
+
+    return {f.__name__: f for f in (
+        predict_cold, predict_hot, predict_approx, predict_batch_1k, what_if, what_if_sweep,
+        projects_page, projects_page_cached, projects_all, projects_export,
+    )}
+
+
+# heavy cases run fewer times
+_SCALE = {"predict_batch_1k": 0.1, "projects_all": 0.1, "projects_export": 0.1}
+
+
+async def _run(n_projects: int, iterations: int, seed: int) -> dict:
+    await api.PROJECT_STORE.insert_projects(synthetic_portfolio(n_projects, seed))
+    rng = np.random.default_rng(seed)
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, make in _cases(rng).items():
+            (await make(client)).raise_for_status()  # warm-up
+            n = max(3, int(iterations * _SCALE.get(name, 1.0)))
+            lat = []
+            for _ in range(n):
+                t = time.perf_counter()
+                r = await make(client)
+                await r.aread()
+                lat.append(time.perf_counter() - t)
+                r.raise_for_status()
+            ms = np.asarray(lat) * 1000.0
+            results[name] = {
+                "n": n,
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+            }
+    await api.PROJECT_STORE.close()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--projects", type=int, default=5000)
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="compare p50 against a previous --json file")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    try:
+        results = asyncio.run(_run(args.projects, args.iterations, args.seed))
+    finally:
+        shutil.rmtree(_DB_DIR, ignore_errors=True)
+    baseline = json.load(open(args.baseline)) if args.baseline else {}
+
+    print(f"{args.projects} synthetic projects")
+    print(f"{'case':<22} {'n':>5} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  vs baseline")
+    regressions = []
+    for name, r in results.items():
+        delta = ""
+        if name in baseline:
+            ratio = r["p50_ms"] / baseline[name]["p50_ms"] - 1.0
+            delta = f"{ratio:+.0%}"
+            if ratio > args.tolerance:
+                regressions.append(name)
+                delta += "  REGRESSION"
+        print(f"{name:<22} {r['n']:>5} {r['mean_ms']:>9.2f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}  {delta}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        print(f"\np50 regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,40 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Annotated, Optional, Dict, List, Literal
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
 
 import numpy as np
-import pandas as pd
-import shap
-from xgboost import XGBRegressor
-from .services.supabase_client import get_supabase
+from .services.batcher import batcher_from_env
+from .services.dependency import CycleError, DependencyGraph
+from .services.heatmap import MAX_PRECISION, SpatialIndex, zoom_to_precision
+from .services.cache import LRUCache, prediction_cache_from_env, quantize, row_keys
+from .services.metrics import BATCH_ROWS, REGISTRY, MetricsMiddleware, stage
+from .services.model_store import FEATURE_KEYS, get_artifacts
+from .services.sweep import MAX_SWEEP_POINTS, SweepCache, axis_values, build_grid
+from .services.storage import StoreNotConfigured, project_store_from_env
 
-app = FastAPI(title="PRISM API", version="1.0.0")
+# ---- Simple model + SHAP setup (demo-grade) ----
+# The model is loaded from the artifact registry on first use (see
+# services/model_store.py); startup only kicks that off in the background.
+# Shutdown stops the predict batcher and closes the project store.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=lambda: get_artifacts().explainer, name="model-warmup", daemon=True).start()
+    yield
+    if PREDICT_BATCHER is not None:
+        await PREDICT_BATCHER.close()
+    await PROJECT_STORE.close()
+
+app = FastAPI(title="PRISM API", version="1.0.0", lifespan=lifespan)
 
 # CORS for local dev web app
 app.add_middleware(
@@ -21,55 +45,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ---- Simple model + SHAP setup (demo-grade) ----
-FEATURE_KEYS = [
-    "labour_cost",
-    "material_cost",
-    "regulatory_delay",
-    "vendor_reliability",
-    "weather_impact",
-]
-
-rng = np.random.default_rng(42)
-
-def _train_demo_model():
-    n = 600
-    X = pd.DataFrame({
-        "labour_cost": rng.uniform(0, 1, n),
-        "material_cost": rng.uniform(0, 1, n),
-        "regulatory_delay": rng.uniform(0, 1, n),
-        "vendor_reliability": rng.uniform(0, 1, n),
-        "weather_impact": rng.uniform(0, 1, n),
-    })
-    # Synthetic target ~ risk probability in [0,1]
-    y = (
-        0.35*X["regulatory_delay"]
-        + 0.30*X["material_cost"]
-        + 0.20*X["weather_impact"]
-        + 0.10*X["labour_cost"]
-        - 0.25*X["vendor_reliability"]
-    ) + rng.normal(0, 0.03, n)
-    y = y.clip(0, 1)
-    model = XGBRegressor(
-        n_estimators=120,
-        max_depth=4,
-        learning_rate=0.08,
-        subsample=0.9,
-        colsample_bytree=0.9,
-        reg_lambda=1.0,
-        tree_method="hist",
-        random_state=42,
-    )
-    model.fit(X, y)
-    explainer = shap.TreeExplainer(model)
-    background = shap.utils.sample(X, 100, random_state=42)
-    return model, explainer, background
+# Per-handler request metrics; SERVER_TIMING=1 adds per-stage Server-Timing headers.
+app.add_middleware(
+    MetricsMiddleware,
+    server_timing=os.getenv('SERVER_TIMING', '0').lower() in ('1', 'true', 'yes', 'on'),
+)
 
-MODEL, EXPLAINER, BG = _train_demo_model()
+# none   - risk/delay/overrun only
+# top_k  - exact tree SHAP (XGBoost pred_contribs), only the top_k drivers
+# full   - exact SHAP for every feature via shap.TreeExplainer
+# approx - XGBoost approx_contribs (Saabas path attribution), every feature
+ExplainMode = Literal["none", "top_k", "full", "approx"]
+
+# features are scored as float32: anything non-finite there breaks the model
+_F32_MAX = float(np.finfo(np.float32).max)
+FeatureValue = Annotated[float, Field(allow_inf_nan=False, ge=-_F32_MAX, le=_F32_MAX)]
 
 class PredictRequest(BaseModel):
     project_id: Optional[str] = None
-    features: Dict[str, float]
+    features: Dict[str, FeatureValue]
+    explain: ExplainMode = "full"
+    top_k: int = Field(2, ge=1)
 
 class PredictResponse(BaseModel):
     delay_months: float
@@ -78,6 +74,60 @@ class PredictResponse(BaseModel):
     shap_values: Optional[dict] = None
     explanation: Optional[str] = None
 
+class BatchPredictRequest(BaseModel):
+    items: List[PredictRequest]
+    # overrides every item's `explain`, e.g. "none" to skip explanations
+    explain: Optional[ExplainMode] = None
+    # stream rows back as NDJSON instead of one JSON array (large batches)
+    stream: bool = False
+
+class SweepAxis(BaseModel):
+    feature: str
+    # either an explicit grid ...
+    values: Optional[List[FeatureValue]] = Field(None, min_length=1, max_length=MAX_SWEEP_POINTS)
+    # ... or an inclusive range
+    start: FeatureValue = 0.0
+    stop: FeatureValue = 1.0
+    steps: int = Field(11, ge=1, le=MAX_SWEEP_POINTS)
+
+# SHAP rows per sweep request (each one is a full TreeExplainer pass)
+MAX_SWEEP_SHAP = 32
+
+class SweepRequest(BaseModel):
+    features: Dict[str, FeatureValue]
+    axes: List[SweepAxis]
+    # grid indices (one per axis) to return SHAP values for
+    shap_at: List[List[int]] = Field([], max_length=MAX_SWEEP_SHAP)
+
+class SweepAxisOut(BaseModel):
+    feature: str
+    values: List[float]
+
+class SweepPointShap(BaseModel):
+    index: List[int]
+    shap_values: dict
+
+class SweepResponse(BaseModel):
+    axes: List[SweepAxisOut]
+    # shaped like the grid: 1 axis -> [n], 2 axes -> [n0][n1]
+    risk_prob: list
+    delay_months: list
+    overrun_cr: list
+    shap: List[SweepPointShap] = []
+    scored_points: int
+    cached_points: int
+
+class GraphNodeIn(BaseModel):
+    delay_months: float
+    overrun_cr: float
+
+class GraphEdgeIn(BaseModel):
+    upstream: str
+    downstream: str
+    # share of the upstream's cascaded delay passed on, minus any slack
+    weight: float = Field(1.0, ge=0)
+    slack_months: float = Field(0.0, ge=0)
+
 class ProjectIn(BaseModel):
     user_id: Optional[str] = None
     code: str
@@ -96,35 +146,286 @@ class ProjectOut(ProjectIn):
 def health():
     return {"status": "ok"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return {"predict": PREDICT_CACHE.stats(), "projects": PROJECTS_CACHE.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of request, stage, batch and cache metrics."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _collect_runtime_metrics():
+    lines = []
+    caches = {"predict": PREDICT_CACHE.stats(), "projects": PROJECTS_CACHE.stats()}
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                        ("expirations", "counter"), ("invalidations", "counter"), ("size", "gauge")):
+        name = f"prism_cache_{field}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} Cache {field}.", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{c}"}} {st[field]}' for c, st in caches.items()]
+    if PREDICT_BATCHER is not None:
+        st = PREDICT_BATCHER.stats()
+        lines += [
+            "# HELP prism_microbatch_batches_total Micro-batches scored.",
+            "# TYPE prism_microbatch_batches_total counter",
+            f"prism_microbatch_batches_total {st['batches']}",
+            "# HELP prism_microbatch_items_total Requests scored through micro-batches.",
+            "# TYPE prism_microbatch_items_total counter",
+            f"prism_microbatch_items_total {st['items']}",
+        ]
+    return lines
+
+REGISTRY.add_collector(_collect_runtime_metrics)
+
 @app.get("/")
 def root():
     # Make the API root clear by redirecting to interactive docs
     return RedirectResponse(url="/docs", status_code=302)
 
-def _vectorize(features: Dict[str, float]) -> pd.DataFrame:
-    data = {k: float(features.get(k, 0.0)) for k in FEATURE_KEYS}
-    return pd.DataFrame([data])
+def _vectorize(features: Dict[str, float]) -> np.ndarray:
+    return _vectorize_many([features])
+
+def _vectorize_many(feature_maps: List[Dict[str, float]]) -> np.ndarray:
+    """Build one (n_rows, n_features) float32 matrix in FEATURE_KEYS order."""
+    n, m = len(feature_maps), len(FEATURE_KEYS)
+    with stage("vectorize"):
+        flat = np.fromiter(
+            (float(f.get(k, 0.0)) for f in feature_maps for k in FEATURE_KEYS),
+            dtype=np.float32,
+            count=n * m,
+        )
+    return flat.reshape(n, m)
 
-def _explain(x_df: pd.DataFrame) -> Dict[str, float]:
-    shap_vals = EXPLAINER.shap_values(x_df, check_additivity=False)
-    vals = shap_vals[0] if isinstance(shap_vals, np.ndarray) else shap_vals.values[0]
-    return {k: float(v) for k, v in zip(FEATURE_KEYS, vals)}
+def _explain(x: np.ndarray, mode: ExplainMode = "full") -> np.ndarray:
+    """Per-feature contributions for every row of x, shape (n_rows, n_features)."""
+    arts = get_artifacts()
+    with stage("explain"):
+        if mode == "full":
+            shap_vals = arts.explainer.shap_values(x, check_additivity=False)
+            return shap_vals if isinstance(shap_vals, np.ndarray) else shap_vals.values
+        from xgboost import DMatrix
+        contribs = arts.model.get_booster().predict(
+            DMatrix(x, feature_names=FEATURE_KEYS),
+            pred_contribs=True,
+            approx_contribs=(mode == "approx"),
+        )
+        return contribs[:, :-1]  # last column is the bias term
+
+def _explanation(shap_row: np.ndarray, k: int = 2) -> str:
+    # simple NL explanation: top k drivers by absolute SHAP
+    top = np.argsort(-np.abs(shap_row), kind="stable")[:k]
+    drivers = ", ".join(f"{FEATURE_KEYS[i]} ({shap_row[i]:.2f})" for i in top)
+    return f"Top drivers: {drivers}."
+
+def _risk(x: np.ndarray) -> np.ndarray:
+    model = get_artifacts().model
+    with stage("predict"):
+        return np.clip(model.predict(x), 0.01, 0.99).astype(np.float64)
+
+def _delay(risk: np.ndarray) -> np.ndarray:
+    return np.round(2 + 10 * risk, 2)
+
+def _overrun(risk: np.ndarray) -> np.ndarray:
+    return np.round(5 + 40 * risk, 2)
+
+# Prediction/explanation cache in front of the model, keyed on the
+# (optionally quantized) feature vector and invalidated when the model
+# fingerprint changes. PREDICT_CACHE_SIZE=0 disables it.
+PREDICT_CACHE = prediction_cache_from_env()
+PREDICT_CACHE_QUANTUM = float(os.getenv('PREDICT_CACHE_QUANTUM', '0'))
+
+def _score_rows(x: np.ndarray, explain: ExplainMode = "full", top_k: int = 2) -> List[PredictResponse]:
+    risk = _risk(x)
+    delay = _delay(risk)
+    overrun = _overrun(risk)
+    shap_vals = _explain(x, explain) if explain != "none" else None
+    BATCH_ROWS.observe(len(x), kind="model")
+    with stage("build_response"):
+        return _build_responses(risk, delay, overrun, shap_vals, explain, top_k)
+
+def _build_responses(risk, delay, overrun, shap_vals, explain: ExplainMode, top_k: int) -> List[PredictResponse]:
+    out = []
+    for i in range(len(risk)):
+        shap_map = explanation = None
+        if shap_vals is not None:
+            row = shap_vals[i]
+            if explain == "top_k":
+                top = np.argsort(-np.abs(row), kind="stable")[:top_k]
+                shap_map = {FEATURE_KEYS[j]: float(row[j]) for j in top}
+                explanation = _explanation(row, top_k)
+            else:
+                shap_map = {k: float(v) for k, v in zip(FEATURE_KEYS, row)}
+                explanation = _explanation(row)
+        out.append(PredictResponse(
+            delay_months=float(delay[i]),
+            overrun_cr=float(overrun[i]),
+            risk_prob=float(risk[i]),
+            shap_values=shap_map,
+            explanation=explanation,
+        ))
+    return out
+
+def _score_batch(feature_maps: List[Dict[str, float]], explain: ExplainMode = "full", top_k: int = 2) -> List[PredictResponse]:
+    """Score N feature maps with one model predict and one explanation pass.
+
+    Rows found in PREDICT_CACHE are reused; only the misses reach the model.
+    """
+    if not feature_maps:
+        return []
+    x = quantize(_vectorize_many(feature_maps), PREDICT_CACHE_QUANTUM)
+    if not PREDICT_CACHE.enabled:
+        return _score_rows(x, explain, top_k)
+    PREDICT_CACHE.set_generation(get_artifacts().fingerprint)
+    with stage("cache"):
+        tag = f"{explain}:{top_k}".encode() if explain == "top_k" else explain.encode()
+        keys = [k + tag for k in row_keys(x)]
+        out: List[Optional[PredictResponse]] = [PREDICT_CACHE.get(k) for k in keys]
+        miss = [i for i, r in enumerate(out) if r is None]
+    if miss:
+        for i, r in zip(miss, _score_rows(x[miss], explain, top_k)):
+            out[i] = r
+            PREDICT_CACHE.put(keys[i], r)
+    return out
+
+def _score_requests(reqs: List[PredictRequest], explain: Optional[ExplainMode] = None) -> List[PredictResponse]:
+    """Score requests that may ask for different explanation modes.
+
+    Rows are grouped by (mode, top_k) so each group is still one vectorized
+    call; results come back in request order.
+    """
+    BATCH_ROWS.observe(len(reqs), kind="requests")
+    groups: Dict[tuple, List[int]] = {}
+    for i, r in enumerate(reqs):
+        mode = explain or r.explain
+        groups.setdefault((mode, r.top_k if mode == "top_k" else 2), []).append(i)
+    out: List[Optional[PredictResponse]] = [None] * len(reqs)
+    for (mode, k), idx in groups.items():
+        for i, r in zip(idx, _score_batch([reqs[i].features for i in idx], mode, k)):
+            out[i] = r
+    return out
+
+# rows scored per model/SHAP call when streaming NDJSON
+BATCH_STREAM_CHUNK = 1024
+
+def _stream_batch(reqs: List[PredictRequest], explain: Optional[ExplainMode]):
+    # explanations are computed chunk by chunk as the client reads
+    for start in range(0, len(reqs), BATCH_STREAM_CHUNK):
+        chunk = reqs[start:start + BATCH_STREAM_CHUNK]
+        results = _score_requests(chunk, explain)
+        _record_scores(chunk, results)
+        for r in results:
+            yield r.model_dump_json() + "\n"
+
+# Concurrent /predict and /what-if calls are queued and scored together
+# (PREDICT_BATCH_MAX_SIZE / PREDICT_BATCH_MAX_WAIT_MS; PREDICT_BATCHING=0
+# falls back to one threadpool call per request).
+PREDICT_BATCHER = batcher_from_env(_score_requests)
+
+_PREDICT_LIST = TypeAdapter(List[PredictResponse])
+
+def _json(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
+
+def _record_scores(reqs: List[PredictRequest], results: List[PredictResponse]):
+    # rescored projects update their heatmap cells and downstream cascade in
+    # place; GRAPH may be locked by a bulk import, so keep this off the event loop
+    locals_ = []
+    for req, res in zip(reqs, results):
+        if req.project_id is not None:
+            HEATMAP.record_score(req.project_id, res.risk_prob, res.delay_months)
+            pid = str(req.project_id)
+            _graph_scores[pid] = (res.delay_months, res.overrun_cr)
+            locals_.append((pid, res.delay_months, res.overrun_cr))
+    if locals_:
+        GRAPH.set_locals(locals_)
+
+async def _predict_one(req: PredictRequest) -> PredictResponse:
+    if PREDICT_BATCHER is None:
+        return (await run_in_threadpool(_score_requests, [req]))[0]
+    # scoring runs on the batcher thread; its stages only reach the histograms
+    with stage("batch_queue"):
+        return await PREDICT_BATCHER.submit(req)
 
 @app.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
-    x = _vectorize(req.features)
-    risk = float(np.clip(MODEL.predict(x)[0], 0.01, 0.99))
-    delay = round(2 + 10 * risk, 2)
-    overrun = round(5 + 40 * risk, 2)
-    shap_map = _explain(x)
-    # simple NL explanation: top 2 drivers by absolute SHAP
-    top = sorted(shap_map.items(), key=lambda kv: abs(kv[1]), reverse=True)[:2]
-    explanation = f"Top drivers: {top[0][0]} ({top[0][1]:.2f}), {top[1][0]} ({top[1][1]:.2f})."
-    return PredictResponse(delay_months=delay, overrun_cr=overrun, risk_prob=risk, shap_values=shap_map, explanation=explanation)
+async def predict(req: PredictRequest):
+    res = await _predict_one(req)
+    if req.project_id is not None:
+        await run_in_threadpool(_record_scores, [req], [res])
+    with stage("serialize"):
+        return _json(res.model_dump_json().encode())
+
+@app.post("/predict/batch", response_model=List[PredictResponse])
+def predict_batch(req: BatchPredictRequest):
+    """Score many projects in one vectorized pass; rows keep request order."""
+    BATCH_ROWS.observe(len(req.items), kind="batch_request")
+    if req.stream:
+        return StreamingResponse(_stream_batch(req.items, req.explain), media_type="application/x-ndjson")
+    out = _score_requests(req.items, req.explain)
+    _record_scores(req.items, out)
+    with stage("serialize"):
+        return _json(_PREDICT_LIST.dump_json(out))
 
 @app.post("/what-if", response_model=PredictResponse)
-def what_if(req: PredictRequest):
-    return predict(req)
+async def what_if(req: PredictRequest):
+    # hypothetical inputs: never recorded against the project
+    res = await _predict_one(req)
+    with stage("serialize"):
+        return _json(res.model_dump_json().encode())
+
+SWEEP_CACHE = SweepCache()
+
+@app.post("/what-if/sweep", response_model=SweepResponse)
+def what_if_sweep(req: SweepRequest):
+    """Score a 1-D or 2-D perturbation grid around a base feature vector.
+
+    Grid points already scored for the same base (and model) come from
+    SWEEP_CACHE, so refining a sweep only pays for the new points.
+    """
+    if not 1 <= len(req.axes) <= 2:
+        raise HTTPException(status_code=422, detail="Sweep needs one or two axes")
+    names = [a.feature for a in req.axes]
+    unknown = [n for n in names if n not in FEATURE_KEYS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown features: {unknown}")
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=422, detail="Sweep axes must use distinct features")
+    shape = tuple(len(a.values) if a.values is not None else a.steps for a in req.axes)
+    if int(np.prod(shape)) > MAX_SWEEP_POINTS:
+        raise HTTPException(status_code=422, detail=f"Sweep must have at most {MAX_SWEEP_POINTS} points")
+    values = [
+        np.asarray(a.values, dtype=np.float32) if a.values is not None else axis_values(a.start, a.stop, a.steps)
+        for a in req.axes
+    ]
+
+    shap_at = list(dict.fromkeys(tuple(idx) for idx in req.shap_at))
+    for idx in shap_at:
+        if len(idx) != len(shape) or any(not 0 <= i < n for i, n in zip(idx, shape)):
+            raise HTTPException(status_code=422, detail=f"shap_at index out of range: {list(idx)}")
+
+    columns = [FEATURE_KEYS.index(n) for n in names]
+    base = _vectorize(req.features)[0]
+    coords, x = build_grid(base, columns, values)
+    key = SWEEP_CACHE.base_key(get_artifacts().fingerprint, base, columns)
+    risk, scored = SWEEP_CACHE.score(key, coords, x, _risk)
+
+    shap_out = []
+    if shap_at:
+        flat = [int(np.ravel_multi_index(idx, shape)) for idx in shap_at]
+        shap_vals = _explain(x[flat])
+        shap_out = [
+            SweepPointShap(index=list(idx), shap_values={k: float(v) for k, v in zip(FEATURE_KEYS, row)})
+            for idx, row in zip(shap_at, shap_vals)
+        ]
+
+    return SweepResponse(
+        axes=[SweepAxisOut(feature=n, values=v.tolist()) for n, v in zip(names, values)],
+        risk_prob=risk.reshape(shape).tolist(),
+        delay_months=_delay(risk).reshape(shape).tolist(),
+        overrun_cr=_overrun(risk).reshape(shape).tolist(),
+        shap=shap_out,
+        scored_points=scored,
+        cached_points=len(risk) - scored,
+    )
 
 @app.post("/extract")
 async def extract(file: UploadFile = File(...)):
@@ -134,42 +435,332 @@ async def extract(file: UploadFile = File(...)):
         "budget_cr": {"value": 18, "confidence": 0.70},
     }
 
+# ---- Projects ----
+# Backend is chosen by PROJECTS_BACKEND (supabase | sql), see services/storage.py.
+PROJECT_STORE = project_store_from_env()
+
+# Serialized /projects pages keyed by query; create_project invalidates it,
+# the TTL bounds staleness from writes that land on other workers.
+PROJECTS_CACHE = LRUCache(
+    max_size=int(os.getenv('PROJECTS_CACHE_SIZE', '256')),
+    ttl_s=float(os.getenv('PROJECTS_CACHE_TTL', '30')),
+)
+PROJECTS_MAX_PAGE = 1000
+
+# normalized /projects fields -> table columns behind them
+PROJECT_FIELDS = {
+    "id": ["id"],
+    "code": ["code"],
+    "name": ["name"],
+    "location": ["location_lat", "location_lng"],
+    "budget_cr": ["budget_cr"],
+    "status": ["status"],
+    "risk": ["risk"],
+    "delay_months": ["delay_months"],
+}
+
+def _project_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(PROJECT_FIELDS)
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [n for n in names if n not in PROJECT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {unknown}")
+    if "id" not in names:
+        names.insert(0, "id")  # the pagination cursor
+    return names
+
+def _project_columns(names: List[str]) -> List[str]:
+    return [c for n in names for c in PROJECT_FIELDS[n]]
+
+def _project_out(r: dict, names: List[str]) -> dict:
+    # normalize shape for the frontend table
+    return {
+        n: [r.get('location_lat'), r.get('location_lng')] if n == "location" else r.get(n)
+        for n in names
+    }
+
 @app.get("/projects")
-def projects(user_id: Optional[str] = None):
-    """Return projects from Supabase if configured; otherwise an empty list."""
+async def projects(
+    request: Request,
+    user_id: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=PROJECTS_MAX_PAGE),
+    fields: Optional[str] = None,
+):
+    """Projects in id order, normalized for the frontend table.
+
+    Keyset pagination: when a page is full, the X-Next-Cursor header holds
+    the after_id for the next one. `fields` is a comma-separated subset of
+    PROJECT_FIELDS. Responses carry an ETag and honour If-None-Match.
+    Returns an empty list when no storage backend is configured.
+    """
+    names = _project_fields(fields)
+    key = (user_id, after_id, limit, tuple(names))
+    page = PROJECTS_CACHE.get(key)
+    if page is None:
+        configured = True
+        try:
+            with stage("storage"):
+                rows = await PROJECT_STORE.list_projects(user_id, after_id, limit, _project_columns(names))
+        except StoreNotConfigured:
+            rows, configured = [], False
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Storage error: {e}")
+        with stage("serialize"):
+            body = json.dumps([_project_out(r, names) for r in rows]).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        cursor = str(rows[-1]["id"]) if limit and len(rows) == limit else None
+        page = (body, etag, cursor)
+        if configured:
+            PROJECTS_CACHE.put(key, page)
+    body, etag, cursor = page
+    headers = {"ETag": etag}
+    if cursor:
+        headers["X-Next-Cursor"] = cursor
+    inm = request.headers.get("if-none-match")
+    if inm and (inm.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in inm.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/projects/export")
+async def export_projects(user_id: Optional[str] = None, fields: Optional[str] = None):
+    """Stream every matching project as NDJSON, fetched page by page."""
+    names = _project_fields(fields)
+
+    async def lines():
+        try:
+            async for r in PROJECT_STORE.iter_projects(user_id, _project_columns(names)):
+                yield json.dumps(_project_out(r, names)) + "\n"
+        except StoreNotConfigured:
+            return
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/projects", response_model=ProjectOut)
+async def create_project(p: ProjectIn):
     try:
-        supa = get_supabase()
-        q = supa.table('projects').select('*')
-        if user_id:
-            q = q.eq('user_id', user_id)
-        res = q.order('id').execute()
-        data = res.data or []
-        # normalize shape for the frontend table
-        out = []
-        for r in data:
-            out.append({
-                "id": r.get('id'),
-                "code": r.get('code'),
-                "name": r.get('name'),
-                "location": [r.get('location_lat'), r.get('location_lng')],
-                "budget_cr": r.get('budget_cr'),
-                "status": r.get('status'),
-                "risk": r.get('risk'),
-                "delay_months": r.get('delay_months'),
-            })
-        return out
+        row = await PROJECT_STORE.insert_project(p.model_dump())
     except Exception as e:
-        # If not configured or table missing, return sensible default
-        return []
+        raise HTTPException(status_code=500, detail=f"Storage error: {e}")
+    PROJECTS_CACHE.invalidate()
+    HEATMAP.upsert_project(row)
+    return row
 
-@app.post("/projects", response_model=ProjectOut)
-def create_project(p: ProjectIn):
+# ---- Risk heatmap ----
+# Geohash rollups (services/heatmap.py), built from storage on first use and
+# then kept current by create_project and by rescores carrying a project_id.
+# Each worker has its own index, so every HEATMAP_REFRESH_S seconds it reads
+# the projects inserted since its last read (ids are ascending) to pick up
+# rows written through other workers (0 = load once).
+HEATMAP = SpatialIndex()
+HEATMAP_REFRESH_S = float(os.getenv('HEATMAP_REFRESH_S', '30'))
+_heatmap_after_id: Optional[int] = None  # highest project id read from storage
+_heatmap_refreshed_at: Optional[float] = None
+_heatmap_lock = asyncio.Lock()
+
+def _heatmap_fresh() -> bool:
+    if _heatmap_refreshed_at is None:
+        return False
+    return HEATMAP_REFRESH_S <= 0 or time.monotonic() - _heatmap_refreshed_at < HEATMAP_REFRESH_S
+
+async def _ensure_heatmap():
+    global _heatmap_after_id, _heatmap_refreshed_at
+    if _heatmap_fresh():
+        return
+    async with _heatmap_lock:
+        if _heatmap_fresh():
+            return
+        cols = ["id", "location_lat", "location_lng", "budget_cr", "risk", "delay_months"]
+        rows = []
+        try:
+            async for r in PROJECT_STORE.iter_projects(columns=cols, after_id=_heatmap_after_id):
+                rows.append(r)
+        except StoreNotConfigured:
+            pass
+        except Exception as e:
+            if HEATMAP.loaded:
+                _heatmap_refreshed_at = time.monotonic()  # keep serving; retry next interval
+                return
+            raise HTTPException(status_code=502, detail=f"Storage error: {e}")
+        if rows:
+            _heatmap_after_id = rows[-1]["id"]
+        await run_in_threadpool(HEATMAP.load, rows)
+        _heatmap_refreshed_at = time.monotonic()
+
+@app.get("/heatmap")
+async def heatmap(
+    zoom: Optional[float] = Query(None, ge=0, le=22),
+    precision: Optional[int] = Query(None, ge=1, le=MAX_PRECISION),
+    bbox: Optional[str] = None,
+):
+    """Portfolio risk per geohash cell.
+
+    Cell size follows `precision`, or is derived from a web-map `zoom`
+    (default zoom 4). `bbox` is min_lat,min_lng,max_lat,max_lng and keeps
+    the cells that overlap it.
+    """
+    box = None
+    if bbox:
+        try:
+            box = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            box = ()
+        if len(box) != 4:
+            raise HTTPException(status_code=422, detail="bbox must be min_lat,min_lng,max_lat,max_lng")
+    p = precision or zoom_to_precision(zoom if zoom is not None else 4)
+    await _ensure_heatmap()
+    with stage("heatmap"):
+        cells = HEATMAP.cells(p, box)
+    return {"precision": p, "version": HEATMAP.version, "cells": cells}
+
+# ---- Dependency graph ----
+# DAG of project dependencies (services/dependency.py). Edges and node
+# values set through PUT are persisted in PROJECT_STORE; each worker
+# rebuilds its graph from there every GRAPH_REFRESH_S seconds (0 = load
+# once) so changes made through other workers show up. Node delays from
+# predictions carrying a project_id stay local to the worker and are kept
+# across rebuilds. Every change re-evaluates only the downstream projects
+# it affects. GRAPH calls go through the threadpool: a bulk import holds
+# the graph lock for a full recompute.
+GRAPH = DependencyGraph()
+GRAPH_REFRESH_S = float(os.getenv('GRAPH_REFRESH_S', '30'))
+_graph_scores: Dict[str, tuple] = {}
+_graph_loaded_at: Optional[float] = None
+_graph_lock = asyncio.Lock()
+
+def _graph_fresh() -> bool:
+    if _graph_loaded_at is None:
+        return False
+    return GRAPH_REFRESH_S <= 0 or time.monotonic() - _graph_loaded_at < GRAPH_REFRESH_S
+
+def _build_graph(nodes: List[dict], edges: List[dict], scores: Dict[str, tuple]) -> DependencyGraph:
+    g = DependencyGraph()
+    g.set_locals((n["project_id"], n["delay_months"], n["overrun_cr"]) for n in nodes)
+    g.set_locals((pid, delay, overrun) for pid, (delay, overrun) in scores.items())
+    rows = [(e["upstream"], e["downstream"], e["weight"], e["slack_months"]) for e in edges]
+    try:
+        g.add_edges(rows)
+    except CycleError:
+        # workers racing on opposite edges can persist a cycle; keep what fits
+        for row in rows:
+            try:
+                g.add_edge(*row)
+            except CycleError:
+                pass
+    return g
+
+async def _refresh_graph():
+    """Rebuild GRAPH from storage if stale; caller holds _graph_lock."""
+    global GRAPH, _graph_loaded_at
+    if _graph_fresh():
+        return
+    try:
+        nodes = await PROJECT_STORE.list_dependency_nodes()
+        edges = await PROJECT_STORE.list_dependencies()
+    except StoreNotConfigured:
+        _graph_loaded_at = time.monotonic()  # in-memory only
+        return
+    except Exception as e:
+        if _graph_loaded_at is not None:
+            return  # keep serving the previous graph
+        raise HTTPException(status_code=502, detail=f"Storage error: {e}")
+    scores = dict(_graph_scores)
+    g = await run_in_threadpool(_build_graph, nodes, edges, scores)
+    # rescores recorded while the graph was being built
+    late = [(pid, *v) for pid, v in list(_graph_scores.items()) if scores.get(pid) != v]
+    if late:
+        await run_in_threadpool(g.set_locals, late)
+    GRAPH, _graph_loaded_at = g, time.monotonic()
+
+async def _ensure_graph():
+    if _graph_fresh():
+        return
+    async with _graph_lock:
+        await _refresh_graph()
+
+async def _persist_graph(write):
+    """Await a store write for a change already applied to GRAPH.
+
+    On failure the in-memory graph no longer matches storage, so it is
+    rebuilt on next use.
+    """
+    global _graph_loaded_at
     try:
-        supa = get_supabase()
-        payload = p.dict()
-        res = supa.table('projects').insert(payload).execute()
-        if not res.data:
-            raise HTTPException(status_code=500, detail="Insert failed")
-        return res.data[0]
+        await write
+    except StoreNotConfigured:
+        pass
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Supabase error: {e}")
+        _graph_loaded_at = None
+        raise HTTPException(status_code=502, detail=f"Storage error: {e}")
+
+@app.get("/graph")
+async def graph_summary(limit: int = Query(20, ge=1, le=1000)):
+    """Graph size and the projects with the largest cascaded delay."""
+    await _ensure_graph()
+    top = await run_in_threadpool(GRAPH.top_delayed, limit)
+    return {"nodes": len(GRAPH), "edges": GRAPH.edges, "top_delayed": top}
+
+@app.get("/graph/nodes/{project_id}")
+async def graph_node(project_id: str):
+    await _ensure_graph()
+    if project_id not in GRAPH:
+        raise HTTPException(status_code=404, detail="Project not in dependency graph")
+    return await run_in_threadpool(GRAPH.node, project_id)
+
+@app.put("/graph/nodes/{project_id}")
+async def graph_set_node(project_id: str, body: GraphNodeIn):
+    async with _graph_lock:
+        await _refresh_graph()
+        touched = await run_in_threadpool(GRAPH.set_local, project_id, body.delay_months, body.overrun_cr)
+        _graph_scores.pop(project_id, None)
+        await _persist_graph(PROJECT_STORE.upsert_dependency_node(
+            {"project_id": project_id, "delay_months": body.delay_months, "overrun_cr": body.overrun_cr}))
+        return {**await run_in_threadpool(GRAPH.node, project_id), "recomputed": touched}
+
+@app.delete("/graph/nodes/{project_id}")
+async def graph_remove_node(project_id: str):
+    async with _graph_lock:
+        await _refresh_graph()
+        try:
+            touched = await run_in_threadpool(GRAPH.remove_node, project_id)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Project not in dependency graph")
+        _graph_scores.pop(project_id, None)
+        await _persist_graph(PROJECT_STORE.delete_dependency_node(project_id))
+        return {"recomputed": touched}
+
+@app.post("/graph/edges")
+async def graph_add_edge(edge: GraphEdgeIn):
+    async with _graph_lock:
+        await _refresh_graph()
+        try:
+            touched = await run_in_threadpool(GRAPH.add_edge, edge.upstream, edge.downstream, edge.weight, edge.slack_months)
+        except CycleError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        await _persist_graph(PROJECT_STORE.upsert_dependencies([edge.model_dump()]))
+        return {**await run_in_threadpool(GRAPH.node, edge.downstream), "recomputed": touched}
+
+@app.post("/graph/edges/bulk")
+async def graph_add_edges(edges: List[GraphEdgeIn]):
+    """Import many dependencies at once (one topological sort + full recompute)."""
+    rows = [(e.upstream, e.downstream, e.weight, e.slack_months) for e in edges]
+    async with _graph_lock:
+        await _refresh_graph()
+        try:
+            touched = await run_in_threadpool(GRAPH.add_edges, rows)
+        except CycleError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        await _persist_graph(PROJECT_STORE.upsert_dependencies([e.model_dump() for e in edges]))
+        return {"nodes": len(GRAPH), "edges": GRAPH.edges, "recomputed": touched}
+
+@app.delete("/graph/edges")
+async def graph_remove_edge(upstream: str, downstream: str):
+    async with _graph_lock:
+        await _refresh_graph()
+        try:
+            touched = await run_in_threadpool(GRAPH.remove_edge, upstream, downstream)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"No edge {upstream} -> {downstream}")
+        await _persist_graph(PROJECT_STORE.delete_dependency(upstream, downstream))
+        return {"recomputed": touched}
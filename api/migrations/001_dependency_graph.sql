@@ -0,0 +1,21 @@
+-- Dependency graph tables used by /graph (see services/storage.py).
+-- Apply once to the Supabase/Postgres database, e.g. in the Supabase SQL
+-- editor or with psql. The SQL backend creates the same tables itself.
+
+create table if not exists project_dependencies (
+    upstream     text             not null,
+    downstream   text             not null,
+    weight       double precision not null default 1 check (weight >= 0),
+    slack_months double precision not null default 0 check (slack_months >= 0),
+    -- also the conflict target of the upsert on (upstream, downstream)
+    primary key (upstream, downstream)
+);
+
+create index if not exists ix_project_dependencies_downstream
+    on project_dependencies (downstream);
+
+create table if not exists project_dependency_nodes (
+    project_id   text             primary key,
+    delay_months double precision not null,
+    overrun_cr   double precision not null
+);
@@ -0,0 +1,126 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row requests into one scoring call.
+
+    `submit` enqueues an item and awaits its result. A collector task drains
+    the queue until `max_batch` items are waiting or `max_wait_ms` has passed
+    since the first one arrived, then hands the whole batch to `score_fn` on
+    a dedicated single-thread executor (keeping native XGBoost/SHAP work off
+    the event loop and off FastAPI's shared threadpool) and resolves each
+    waiter with its row of the result. If the batch call raises, its items
+    are rescored one by one so each waiter gets its own result or error.
+
+    The collector is bound to the event loop of the first `submit` and is
+    restarted transparently if that loop goes away (e.g. between test
+    clients).
+    """
+
+    def __init__(self, score_fn: Callable[[List[Any]], List[Any]], max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.score_fn = score_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict-batch")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_started()
+        fut = self._loop.create_future()
+        await self._queue.put((item, fut))
+        return await fut
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            # take whatever is already queued without yielding first
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - self._loop.time()
+            if len(batch) >= self.max_batch or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await self._loop.run_in_executor(self._executor, self.score_fn, items)
+            except Exception as e:
+                if len(batch) == 1:
+                    self._fail(batch[0][1], e)
+                else:
+                    # don't let one bad row fail its neighbours: retry each on its own
+                    await self._run_each(batch)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, fut), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
+
+    async def _run_each(self, batch: list):
+        for item, fut in batch:
+            try:
+                res = (await self._loop.run_in_executor(self._executor, self.score_fn, [item]))[0]
+            except Exception as e:
+                self._fail(fut, e)
+                continue
+            self.batches += 1
+            self.items += 1
+            if not fut.done():
+                fut.set_result(res)
+
+    @staticmethod
+    def _fail(fut: asyncio.Future, e: Exception):
+        if not fut.done():
+            fut.set_exception(e)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+def batcher_from_env(score_fn: Callable[[List[Any]], List[Any]]) -> Optional[MicroBatcher]:
+    """MicroBatcher configured from PREDICT_BATCH_* env vars, or None when disabled."""
+    if os.getenv('PREDICT_BATCHING', '1').lower() in ('0', 'false', 'no', 'off'):
+        return None
+    return MicroBatcher(
+        score_fn,
+        max_batch=int(os.getenv('PREDICT_BATCH_MAX_SIZE', '64')),
+        max_wait_ms=float(os.getenv('PREDICT_BATCH_MAX_WAIT_MS', '2')),
+    )
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional TTL and hit/miss/eviction counters.
+
+    Entries are tagged with a *generation* (e.g. the model fingerprint); when
+    `set_generation` sees a new value the cache empties itself, so results
+    from an old model can never be served.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_s: float = 0.0):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.generation: Optional[Hashable] = None
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def set_generation(self, generation: Hashable):
+        if generation == self.generation:
+            return
+        with self._lock:
+            if generation != self.generation:
+                if self.generation is not None:
+                    self.invalidations += 1
+                self._data.clear()
+                self.generation = generation
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, value = item
+            if self.ttl_s and time.monotonic() - stored_at > self.ttl_s:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop everything because the underlying data changed."""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def quantize(x: np.ndarray, quantum: float) -> np.ndarray:
+    """Snap feature values to a grid of `quantum` (no-op when quantum <= 0)."""
+    if quantum <= 0:
+        return x
+    return (np.round(x / quantum) * quantum).astype(x.dtype, copy=False)
+
+
+def row_keys(x: np.ndarray) -> list:
+    """Hashable cache key per row of a float32 feature matrix."""
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    return [row.tobytes() for row in x]
+
+
+def prediction_cache_from_env() -> LRUCache:
+    return LRUCache(
+        max_size=int(os.getenv('PREDICT_CACHE_SIZE', '4096')),
+        ttl_s=float(os.getenv('PREDICT_CACHE_TTL', '600')),
+    )
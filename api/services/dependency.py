@@ -0,0 +1,303 @@
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Changes smaller than this do not propagate further downstream.
+EPS = 1e-9
+
+
+class CycleError(ValueError):
+    """Adding the edge would make the dependency graph cyclic."""
+
+
+class _Node:
+    __slots__ = ("local_delay", "local_overrun", "delay", "overrun", "inherited", "critical", "preds", "succs")
+
+    def __init__(self):
+        self.local_delay = 0.0
+        self.local_overrun = 0.0
+        self.delay = 0.0       # cascaded
+        self.overrun = 0.0     # cascaded
+        self.inherited = 0.0   # delay pushed in by upstream projects
+        self.critical: Optional[str] = None
+        # neighbour -> (weight, slack_months)
+        self.preds: Dict[str, Tuple[float, float]] = {}
+        self.succs: Dict[str, Tuple[float, float]] = {}
+
+
+class DependencyGraph:
+    """DAG of project dependencies with incremental delay/overrun propagation.
+
+    An edge u -> v means v cannot finish on time while u is late: v inherits
+    max(0, weight * delay(u) - slack_months) from its worst upstream, so
+
+        delay(v)   = local_delay(v) + inherited(v)
+        overrun(v) = local_overrun(v) + inherited(v) * local_overrun(v) / local_delay(v)
+
+    i.e. inherited months cost what v's own predicted months cost.
+
+    The topological order is cached as an integer position per node and
+    maintained on edge insertion with the Pearce-Kelly algorithm, which only
+    reorders the nodes between the two endpoints. A change re-evaluates
+    nodes in position order starting from the changed one and stops along
+    any path where the cascaded values do not move, so work is bounded by
+    the affected downstream subgraph rather than the graph size.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, _Node] = {}
+        self._pos: Dict[str, int] = {}
+        self._next_pos = 0
+        self._order: Optional[List[str]] = None
+        self._lock = threading.RLock()
+        self.edges = 0
+        # nodes re-evaluated by the last change, for benchmarks/metrics
+        self.last_touched = 0
+
+    # ---- structure ----
+
+    def _node(self, pid: str) -> _Node:
+        n = self._nodes.get(pid)
+        if n is None:
+            n = self._nodes[pid] = _Node()
+            self._pos[pid] = self._next_pos
+            self._next_pos += 1
+            if self._order is not None:
+                self._order.append(pid)
+        return n
+
+    def __contains__(self, pid: str) -> bool:
+        return pid in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def set_local(self, pid: str, delay_months: float, overrun_cr: float) -> int:
+        """Set a project's own predicted delay/overrun; returns nodes re-evaluated."""
+        with self._lock:
+            n = self._node(pid)
+            n.local_delay, n.local_overrun = float(delay_months), float(overrun_cr)
+            return self._propagate([pid])
+
+    def set_locals(self, items) -> int:
+        """Bulk set_local for (project_id, delay_months, overrun_cr) tuples.
+
+        All values are written first and then propagated in one pass, so a
+        batch rescore re-evaluates each affected downstream node once.
+        """
+        with self._lock:
+            seeds = {}
+            for pid, delay_months, overrun_cr in items:
+                n = self._node(pid)
+                n.local_delay, n.local_overrun = float(delay_months), float(overrun_cr)
+                seeds[pid] = None
+            return self._propagate(list(seeds))
+
+    def add_edge(self, upstream: str, downstream: str, weight: float = 1.0, slack_months: float = 0.0) -> int:
+        """Add (or re-weight) upstream -> downstream; raises CycleError if it would close a cycle."""
+        if upstream == downstream:
+            raise CycleError(f"{upstream} cannot depend on itself")
+        with self._lock:
+            u, v = self._node(upstream), self._node(downstream)
+            if downstream not in u.succs and self._pos[upstream] > self._pos[downstream]:
+                self._reorder(upstream, downstream)
+            if downstream not in u.succs:
+                self.edges += 1
+            u.succs[downstream] = v.preds[upstream] = (float(weight), float(slack_months))
+            return self._propagate([downstream])
+
+    def add_edges(self, edges) -> int:
+        """Bulk-insert (upstream, downstream, weight, slack_months) tuples.
+
+        Cheaper than repeated add_edge for large imports: one O(V+E)
+        topological sort and one full recompute instead of per-edge
+        reordering. Nothing is applied if the batch would create a cycle.
+        """
+        with self._lock:
+            added, created = [], []
+            try:
+                for upstream, downstream, weight, slack in edges:
+                    if upstream == downstream:
+                        raise CycleError(f"{upstream} cannot depend on itself")
+                    created.extend(pid for pid in (upstream, downstream) if pid not in self._nodes)
+                    u, v = self._node(upstream), self._node(downstream)
+                    added.append((upstream, downstream, u.succs.get(downstream)))
+                    if downstream not in u.succs:
+                        self.edges += 1
+                    u.succs[downstream] = v.preds[upstream] = (float(weight), float(slack))
+                order = self._kahn()
+                if order is None:
+                    raise CycleError("Edges would create a cycle")
+            except BaseException:
+                self._undo(added, created)
+                raise
+            self._pos = {pid: i for i, pid in enumerate(order)}
+            self._next_pos = len(order)
+            self._order = order
+            return self.recompute_all()
+
+    def _undo(self, added, created):
+        for upstream, downstream, prev in reversed(added):
+            u, v = self._nodes[upstream], self._nodes[downstream]
+            if prev is None:
+                if downstream in u.succs:
+                    del u.succs[downstream]
+                    del v.preds[upstream]
+                    self.edges -= 1
+            else:
+                u.succs[downstream] = v.preds[upstream] = prev
+        # nodes created by the batch took the last positions, in order
+        for pid in created:
+            del self._nodes[pid]
+            del self._pos[pid]
+        if created:
+            self._next_pos -= len(created)
+            if self._order is not None:
+                del self._order[-len(created):]
+
+    def _kahn(self) -> Optional[List[str]]:
+        # ties broken by current position so unrelated nodes keep their order
+        indeg = {pid: len(n.preds) for pid, n in self._nodes.items()}
+        heap = [(self._pos[pid], pid) for pid, d in indeg.items() if d == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            _, pid = heapq.heappop(heap)
+            order.append(pid)
+            for s in self._nodes[pid].succs:
+                indeg[s] -= 1
+                if indeg[s] == 0:
+                    heapq.heappush(heap, (self._pos[s], s))
+        return order if len(order) == len(self._nodes) else None
+
+    def remove_edge(self, upstream: str, downstream: str) -> int:
+        with self._lock:
+            u, v = self._nodes.get(upstream), self._nodes.get(downstream)
+            if u is None or v is None or downstream not in u.succs:
+                raise KeyError(f"No edge {upstream} -> {downstream}")
+            del u.succs[downstream]
+            del v.preds[upstream]
+            self.edges -= 1
+            return self._propagate([downstream])
+
+    def remove_node(self, pid: str) -> int:
+        with self._lock:
+            n = self._nodes.pop(pid, None)
+            if n is None:
+                raise KeyError(pid)
+            for p in n.preds:
+                del self._nodes[p].succs[pid]
+            for s in n.succs:
+                del self._nodes[s].preds[pid]
+            self.edges -= len(n.preds) + len(n.succs)
+            del self._pos[pid]
+            self._order = None
+            return self._propagate(list(n.succs))
+
+    def topological_order(self) -> List[str]:
+        with self._lock:
+            if self._order is None:
+                self._order = sorted(self._nodes, key=self._pos.__getitem__)
+            return list(self._order)
+
+    def _reorder(self, upstream: str, downstream: str):
+        """Pearce-Kelly: restore pos(upstream) < pos(downstream) by shuffling the affected region."""
+        lo, hi = self._pos[downstream], self._pos[upstream]
+        # nodes reachable from downstream that currently sit before upstream
+        fwd, stack, seen = [], [downstream], {downstream}
+        while stack:
+            x = stack.pop()
+            fwd.append(x)
+            for s in self._nodes[x].succs:
+                if s == upstream:
+                    raise CycleError(f"{upstream} -> {downstream} would create a cycle")
+                if s not in seen and self._pos[s] < hi:
+                    seen.add(s)
+                    stack.append(s)
+        # nodes that reach upstream and currently sit after downstream
+        back, stack, seen_b = [], [upstream], {upstream}
+        while stack:
+            x = stack.pop()
+            back.append(x)
+            for p in self._nodes[x].preds:
+                if p not in seen_b and self._pos[p] > lo:
+                    seen_b.add(p)
+                    stack.append(p)
+        back.sort(key=self._pos.__getitem__)
+        fwd.sort(key=self._pos.__getitem__)
+        slots = sorted(self._pos[x] for x in back + fwd)
+        for x, p in zip(back + fwd, slots):
+            self._pos[x] = p
+        self._order = None
+
+    # ---- propagation ----
+
+    def _evaluate(self, n: _Node) -> bool:
+        inherited, critical = 0.0, None
+        for p, (w, slack) in n.preds.items():
+            d = w * self._nodes[p].delay - slack
+            if d > inherited:
+                inherited, critical = d, p
+        rate = n.local_overrun / n.local_delay if n.local_delay > 0 else 0.0
+        delay = n.local_delay + inherited
+        overrun = n.local_overrun + inherited * rate
+        changed = abs(delay - n.delay) > EPS or abs(overrun - n.overrun) > EPS
+        n.delay, n.overrun, n.inherited, n.critical = delay, overrun, inherited, critical
+        return changed
+
+    def _propagate(self, seeds: List[str]) -> int:
+        """Re-evaluate seeds and whatever downstream they actually change, in topological order."""
+        pos = self._pos
+        heap = [(pos[s], s) for s in seeds if s in self._nodes]
+        heapq.heapify(heap)
+        queued = {s for _, s in heap}
+        touched = 0
+        while heap:
+            _, pid = heapq.heappop(heap)
+            n = self._nodes[pid]
+            touched += 1
+            if self._evaluate(n):
+                for s in n.succs:
+                    if s not in queued:
+                        queued.add(s)
+                        heapq.heappush(heap, (pos[s], s))
+        self.last_touched = touched
+        return touched
+
+    def recompute_all(self) -> int:
+        with self._lock:
+            for pid in self.topological_order():
+                self._evaluate(self._nodes[pid])
+            self.last_touched = len(self._nodes)
+            return self.last_touched
+
+    # ---- reads ----
+
+    def node(self, pid: str) -> dict:
+        with self._lock:
+            n = self._nodes[pid]
+            return {
+                "project_id": pid,
+                "local_delay_months": n.local_delay,
+                "local_overrun_cr": n.local_overrun,
+                "inherited_delay_months": n.inherited,
+                "cascaded_delay_months": n.delay,
+                "cascaded_overrun_cr": n.overrun,
+                "critical_upstream": n.critical,
+                "upstream": [{"project_id": p, "weight": w, "slack_months": s} for p, (w, s) in n.preds.items()],
+                "downstream": [{"project_id": p, "weight": w, "slack_months": s} for p, (w, s) in n.succs.items()],
+            }
+
+    def top_delayed(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            best = heapq.nlargest(limit, self._nodes.items(), key=lambda kv: kv[1].delay)
+            return [
+                {
+                    "project_id": pid,
+                    "cascaded_delay_months": n.delay,
+                    "cascaded_overrun_cr": n.overrun,
+                    "inherited_delay_months": n.inherited,
+                    "critical_upstream": n.critical,
+                }
+                for pid, n in best
+            ]
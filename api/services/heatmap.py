@@ -0,0 +1,182 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ---- geohash ----
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+# Finest level kept; precision 6 cells are ~1.2 km x 0.6 km.
+MAX_PRECISION = 6
+
+# Projects that were never rescored only carry a risk label.
+RISK_LABEL_PROB = {"low": 0.2, "medium": 0.5, "high": 0.8}
+
+
+def geohash_encode(lat: float, lng: float, precision: int = MAX_PRECISION) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch, lng_lo = (ch << 1) | 1, mid
+            else:
+                ch, lng_hi = ch << 1, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = (ch << 1) | 1, mid
+            else:
+                ch, lat_hi = ch << 1, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+
+def geohash_bounds(gh: str) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) of a geohash cell."""
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in gh:
+        v = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (v >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def zoom_to_precision(zoom: float) -> int:
+    """Geohash precision giving a handful of cells per web-map tile at `zoom`."""
+    # a zoom-z tile spans 360/2^z deg of longitude; precision p has ceil(5p/2) lng bits
+    return max(1, min(MAX_PRECISION, round(2 * (zoom + 3) / 5)))
+
+
+def risk_from_label(risk) -> Optional[float]:
+    if risk is None:
+        return None
+    try:
+        return float(risk)
+    except (TypeError, ValueError):
+        return RISK_LABEL_PROB.get(str(risk).strip().lower())
+
+
+class _Project:
+    __slots__ = ("cells", "risk", "budget", "delay", "scored")
+
+    def __init__(self):
+        self.cells: Tuple[str, ...] = ()
+        self.risk: Optional[float] = None
+        self.budget: Optional[float] = None
+        self.delay: Optional[float] = None
+        self.scored = False
+
+
+# rollup slots
+_COUNT, _RISK_SUM, _RISK_N, _BUDGET_SUM, _DELAY_SUM, _DELAY_N = range(6)
+
+
+class SpatialIndex:
+    """Per-geohash-cell rollups of the portfolio at every precision 1..MAX_PRECISION.
+
+    Each project contributes to exactly one cell per level, so an insert,
+    move or rescore touches MAX_PRECISION cells: its old contribution is
+    subtracted and the new one added. Nothing is ever recomputed in bulk
+    after the initial `load`.
+    """
+
+    def __init__(self):
+        self.levels: List[Dict[str, List[float]]] = [{} for _ in range(MAX_PRECISION + 1)]
+        self._projects: Dict[str, _Project] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.version = 0
+
+    def _apply(self, p: _Project, sign: int):
+        for cell in p.cells:
+            level = self.levels[len(cell)]
+            r = level.get(cell)
+            if r is None:
+                r = level[cell] = [0.0] * 6
+            r[_COUNT] += sign
+            if p.risk is not None:
+                r[_RISK_SUM] += sign * p.risk
+                r[_RISK_N] += sign
+            if p.budget is not None:
+                r[_BUDGET_SUM] += sign * p.budget
+            if p.delay is not None:
+                r[_DELAY_SUM] += sign * p.delay
+                r[_DELAY_N] += sign
+            if r[_COUNT] <= 0:
+                del level[cell]
+
+    def _update(self, project_id: str, **changes):
+        p = self._projects.get(project_id)
+        if p is None:
+            p = self._projects[project_id] = _Project()
+        else:
+            self._apply(p, -1)
+        for k, v in changes.items():
+            setattr(p, k, v)
+        self._apply(p, +1)
+        self.version += 1
+
+    def upsert_project(self, row: dict):
+        """Add or refresh a stored project row (id, location_lat/lng, budget_cr, risk, delay_months)."""
+        if row.get("id") is None:
+            return
+        pid = str(row["id"])
+        lat, lng = row.get("location_lat"), row.get("location_lng")
+        gh = geohash_encode(lat, lng) if lat is not None and lng is not None else ""
+        changes = {
+            "cells": tuple(gh[:i] for i in range(1, len(gh) + 1)),
+            "budget": row.get("budget_cr"),
+        }
+        with self._lock:
+            prev = self._projects.get(pid)
+            if prev is None or not prev.scored:
+                # a model rescore beats the stored label/estimate
+                changes["risk"] = risk_from_label(row.get("risk"))
+                changes["delay"] = row.get("delay_months")
+            self._update(pid, **changes)
+
+    def record_score(self, project_id: str, risk_prob: float, delay_months: float):
+        """Apply a fresh prediction for a project (location may arrive later)."""
+        with self._lock:
+            self._update(str(project_id), risk=risk_prob, delay=delay_months, scored=True)
+
+    def load(self, rows: Iterable[dict]):
+        """Upsert stored rows: the whole table initially, newer rows on refresh."""
+        for row in rows:
+            self.upsert_project(row)
+        self.loaded = True
+
+    def cells(self, precision: int, bbox: Optional[Tuple[float, float, float, float]] = None) -> List[dict]:
+        precision = max(1, min(MAX_PRECISION, precision))
+        with self._lock:
+            items = list(self.levels[precision].items())
+        out = []
+        for gh, r in items:
+            lat0, lng0, lat1, lng1 = geohash_bounds(gh)
+            # keep cells that overlap the box, not just those centred in it
+            if bbox and (lat0 > bbox[2] or lat1 < bbox[0] or lng0 > bbox[3] or lng1 < bbox[1]):
+                continue
+            lat, lng = (lat0 + lat1) / 2, (lng0 + lng1) / 2
+            out.append({
+                "geohash": gh,
+                "lat": lat,
+                "lng": lng,
+                "count": int(r[_COUNT]),
+                "mean_risk_prob": r[_RISK_SUM] / r[_RISK_N] if r[_RISK_N] else None,
+                "total_budget_cr": r[_BUDGET_SUM],
+                "mean_delay_months": r[_DELAY_SUM] / r[_DELAY_N] if r[_DELAY_N] else None,
+            })
+        return out
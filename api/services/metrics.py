@@ -0,0 +1,177 @@
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition without the prometheus_client dependency:
+# counters and histograms with labels, plus free-form collectors.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., +Inf count, sum]
+        self._values: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    v[i] += 1
+                    break
+            else:
+                v[len(self.buckets)] += 1
+            v[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                cum = 0.0
+                for b, c in zip(self.buckets, v):
+                    cum += c
+                    le = 'le="%s"' % b
+                    lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {_fmt_value(cum)}")
+                cum += v[len(self.buckets)]
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {_fmt_value(cum)}")
+                lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {v[-1]!r}")
+                lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {_fmt_value(cum)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], Iterable[str]]):
+        """`fn` returns ready-made exposition lines (e.g. gauges read from a cache)."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        for fn in self._collectors:
+            lines.extend(fn())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter("prism_requests_total", "HTTP requests by handler and status.", ("method", "handler", "status")))
+REQUEST_SECONDS = REGISTRY.register(Histogram("prism_request_seconds", "HTTP request latency until the response starts.", ("handler",)))
+STAGE_SECONDS = REGISTRY.register(Histogram("prism_stage_seconds", "Time spent in each hot-path stage.", ("stage",)))
+BATCH_ROWS = REGISTRY.register(Histogram("prism_batch_rows", "Rows per scoring call.", ("kind",), buckets=SIZE_BUCKETS))
+
+# Stages recorded during the current request, for the Server-Timing header.
+_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("prism_timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block into prism_stage_seconds and the current request's Server-Timing."""
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t
+        STAGE_SECONDS.observe(dt, stage=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, dt))
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    merged: Dict[str, float] = {}
+    for name, dt in timings:
+        merged[name] = merged.get(name, 0.0) + dt
+    parts = [f"{n};dur={dt * 1000:.3f}" for n, dt in merged.items()]
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request counters/latency and optional Server-Timing.
+
+    Latency is measured until the response headers go out, which for
+    streaming responses is time-to-first-byte.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        status = {"code": 500}
+
+        def handler() -> str:
+            ep = scope.get("endpoint")
+            return getattr(ep, "__name__", "unmatched")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                total = time.perf_counter() - t0
+                REQUEST_SECONDS.observe(total, handler=handler())
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings, total).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            REQUESTS.inc(method=scope["method"], handler=handler(), status=status["code"])
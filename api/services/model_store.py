@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+_load = load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+FEATURE_KEYS = [
+    "labour_cost",
+    "material_cost",
+    "regulatory_delay",
+    "vendor_reliability",
+    "weather_impact",
+]
+
+# Bump when the on-disk layout changes so stale artifacts get rebuilt.
+ARTIFACT_FORMAT = 2
+
+_API_DIR = Path(__file__).resolve().parent.parent
+
+
+def artifact_dir() -> Path:
+    """Model registry directory; relative paths resolve against api/."""
+    p = Path(os.getenv('MODEL_REGISTRY_PATH', './ml/artifacts'))
+    return p if p.is_absolute() else (_API_DIR / p).resolve()
+
+
+class ModelArtifacts:
+    """Loaded booster plus everything needed to score and explain with it.
+
+    The SHAP explainer is built on first access so that `shap` (and its
+    sklearn/numba import chain) is only paid for by requests that need it.
+    """
+
+    def __init__(self, model, features, fingerprint):
+        self.model = model
+        self.features = list(features)
+        self.fingerprint = fingerprint
+        self._explainer = None
+        self._lock = threading.Lock()
+
+    @property
+    def explainer(self):
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    import shap
+                    self._explainer = shap.TreeExplainer(self.model)
+        return self._explainer
+
+
+def train_demo_model():
+    """Fit the demo XGBoost model on synthetic data."""
+    import pandas as pd
+    from xgboost import XGBRegressor
+
+    rng = np.random.default_rng(42)
+    n = 600
+    X = pd.DataFrame({
+        "labour_cost": rng.uniform(0, 1, n),
+        "material_cost": rng.uniform(0, 1, n),
+        "regulatory_delay": rng.uniform(0, 1, n),
+        "vendor_reliability": rng.uniform(0, 1, n),
+        "weather_impact": rng.uniform(0, 1, n),
+    })
+    # Synthetic target ~ risk probability in [0,1]
+    y = (
+        0.35*X["regulatory_delay"]
+        + 0.30*X["material_cost"]
+        + 0.20*X["weather_impact"]
+        + 0.10*X["labour_cost"]
+        - 0.25*X["vendor_reliability"]
+    ) + rng.normal(0, 0.03, n)
+    y = y.clip(0, 1)
+    model = XGBRegressor(
+        n_estimators=120,
+        max_depth=4,
+        learning_rate=0.08,
+        subsample=0.9,
+        colsample_bytree=0.9,
+        reg_lambda=1.0,
+        tree_method="hist",
+        random_state=42,
+    )
+    model.fit(X, y)
+    return model
+
+
+def _fingerprint(raw: bytes, features) -> str:
+    h = hashlib.sha256(raw)
+    h.update(json.dumps(list(features)).encode())
+    return h.hexdigest()[:16]
+
+
+def _write_atomic(path: Path, data: bytes):
+    # unique temp name: several workers may save the same registry at once
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def save_artifacts(model, directory: Path | None = None) -> ModelArtifacts:
+    """Persist the booster (UBJ) and its metadata; meta.json is written last."""
+    d = directory or artifact_dir()
+    d.mkdir(parents=True, exist_ok=True)
+    raw = bytes(model.get_booster().save_raw("ubj"))
+    fp = _fingerprint(raw, FEATURE_KEYS)
+    _write_atomic(d / 'model.ubj', raw)
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "features": FEATURE_KEYS,
+        "fingerprint": fp,
+        "booster": "model.ubj",
+    }
+    _write_atomic(d / 'meta.json', json.dumps(meta, indent=2).encode())
+    return ModelArtifacts(model, FEATURE_KEYS, fp)
+
+
+def load_artifacts(directory: Path | None = None) -> ModelArtifacts | None:
+    """Load persisted artifacts, or None if missing, incomplete, stale or for other features."""
+    d = directory or artifact_dir()
+    try:
+        meta = json.loads((d / 'meta.json').read_text())
+        if meta.get('format') != ARTIFACT_FORMAT or meta.get('features') != FEATURE_KEYS:
+            return None
+        raw = (d / meta['booster']).read_bytes()
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if _fingerprint(raw, meta['features']) != meta.get('fingerprint'):
+        return None
+    from xgboost import XGBRegressor
+    model = XGBRegressor()
+    try:
+        model.load_model(bytearray(raw))
+    except ValueError:  # XGBoostError: corrupt booster
+        return None
+    return ModelArtifacts(model, meta['features'], meta['fingerprint'])
+
+
+_artifacts: ModelArtifacts | None = None
+_artifacts_lock = threading.Lock()
+
+
+def get_artifacts() -> ModelArtifacts:
+    """Process-wide model; loads from the registry, training + saving only if absent."""
+    global _artifacts
+    if _artifacts is None:
+        with _artifacts_lock:
+            if _artifacts is None:
+                arts = load_artifacts()
+                if arts is None:
+                    arts = save_artifacts(train_demo_model())
+                _artifacts = arts
+    return _artifacts
+
@@ -0,0 +1,362 @@
+import abc
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+_load = load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+PROJECT_COLUMNS = [
+    "id",
+    "user_id",
+    "code",
+    "name",
+    "location_lat",
+    "location_lng",
+    "budget_cr",
+    "status",
+    "risk",
+    "delay_months",
+]
+
+
+class StoreNotConfigured(RuntimeError):
+    """The selected backend has no credentials/URL; callers may treat it as empty."""
+
+
+DEPENDENCY_COLUMNS = ["upstream", "downstream", "weight", "slack_months"]
+DEPENDENCY_NODE_COLUMNS = ["project_id", "delay_months", "overrun_cr"]
+
+
+class ProjectStore(abc.ABC):
+    """Async access to the `projects` table and the dependency graph tables.
+
+    Listing is keyset-paginated on `id` (rows with id > after_id, ascending)
+    so deep pages cost the same as the first one, and `columns` limits what
+    is fetched.
+
+    `project_dependencies` holds graph edges keyed by (upstream, downstream)
+    and `project_dependency_nodes` the delay/overrun set by hand for a node,
+    so every worker rebuilds the same graph.
+    """
+
+    @abc.abstractmethod
+    async def list_projects(self, user_id: Optional[str] = None, after_id: Optional[int] = None,
+                            limit: Optional[int] = None, columns: Optional[Sequence[str]] = None) -> List[dict]:
+        ...
+
+    @abc.abstractmethod
+    async def insert_project(self, payload: dict) -> dict:
+        ...
+
+    async def insert_projects(self, payloads: Sequence[dict]) -> int:
+        """Bulk insert; returns the number of rows written."""
+        for p in payloads:
+            await self.insert_project(p)
+        return len(payloads)
+
+    @abc.abstractmethod
+    async def list_dependencies(self) -> List[dict]:
+        ...
+
+    @abc.abstractmethod
+    async def upsert_dependencies(self, rows: Sequence[dict]) -> int:
+        """Insert or re-weight edges; returns the number of rows written."""
+
+    @abc.abstractmethod
+    async def delete_dependency(self, upstream: str, downstream: str):
+        ...
+
+    @abc.abstractmethod
+    async def list_dependency_nodes(self) -> List[dict]:
+        ...
+
+    @abc.abstractmethod
+    async def upsert_dependency_node(self, row: dict):
+        ...
+
+    @abc.abstractmethod
+    async def delete_dependency_node(self, project_id: str):
+        """Drop a node's stored values and every edge touching it."""
+
+    async def iter_projects(self, user_id: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+                            page_size: int = 1000, after_id: Optional[int] = None) -> AsyncIterator[dict]:
+        """Every matching row with id > after_id, fetched page by page."""
+        if columns is not None and "id" not in columns:
+            columns = ["id", *columns]
+        while True:
+            page = await self.list_projects(user_id, after_id, page_size, columns)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["id"]
+
+    async def close(self):
+        pass
+
+
+class SupabaseProjectStore(ProjectStore):
+    """Supabase/PostgREST backend; the sync client runs in worker threads."""
+
+    def _client(self):
+        from .supabase_client import SUPABASE_ANON_KEY, SUPABASE_URL, get_supabase
+        if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+            raise StoreNotConfigured("Supabase URL/Key not configured")
+        return get_supabase()
+
+    async def list_projects(self, user_id=None, after_id=None, limit=None, columns=None):
+        def run():
+            q = self._client().table('projects').select(','.join(columns) if columns else '*')
+            if user_id:
+                q = q.eq('user_id', user_id)
+            if after_id is not None:
+                q = q.gt('id', after_id)
+            q = q.order('id')
+            if limit:
+                q = q.limit(limit)
+            return q.execute().data or []
+        return await asyncio.to_thread(run)
+
+    async def insert_project(self, payload):
+        def run():
+            res = self._client().table('projects').insert(payload).execute()
+            if not res.data:
+                raise RuntimeError("Insert failed")
+            return res.data[0]
+        return await asyncio.to_thread(run)
+
+    async def insert_projects(self, payloads):
+        if not payloads:
+            return 0
+        def run():
+            res = self._client().table('projects').insert(list(payloads)).execute()
+            return len(res.data or [])
+        return await asyncio.to_thread(run)
+
+    def _select_all(self, table: str, columns: Sequence[str], page_size: int = 1000) -> List[dict]:
+        # PostgREST caps rows per response, so read in ranges
+        rows, start = [], 0
+        while True:
+            page = self._client().table(table).select(','.join(columns)).range(start, start + page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            start += page_size
+
+    async def list_dependencies(self):
+        return await asyncio.to_thread(self._select_all, 'project_dependencies', DEPENDENCY_COLUMNS)
+
+    async def upsert_dependencies(self, rows):
+        if not rows:
+            return 0
+        def run():
+            res = self._client().table('project_dependencies').upsert(
+                [{k: r[k] for k in DEPENDENCY_COLUMNS} for r in rows], on_conflict='upstream,downstream').execute()
+            return len(res.data or [])
+        return await asyncio.to_thread(run)
+
+    async def delete_dependency(self, upstream, downstream):
+        def run():
+            self._client().table('project_dependencies').delete().eq('upstream', upstream).eq('downstream', downstream).execute()
+        await asyncio.to_thread(run)
+
+    async def list_dependency_nodes(self):
+        return await asyncio.to_thread(self._select_all, 'project_dependency_nodes', DEPENDENCY_NODE_COLUMNS)
+
+    async def upsert_dependency_node(self, row):
+        def run():
+            self._client().table('project_dependency_nodes').upsert(
+                {k: row[k] for k in DEPENDENCY_NODE_COLUMNS}, on_conflict='project_id').execute()
+        await asyncio.to_thread(run)
+
+    async def delete_dependency_node(self, project_id):
+        def run():
+            c = self._client()
+            c.table('project_dependencies').delete().eq('upstream', project_id).execute()
+            c.table('project_dependencies').delete().eq('downstream', project_id).execute()
+            c.table('project_dependency_nodes').delete().eq('project_id', project_id).execute()
+        await asyncio.to_thread(run)
+
+
+class SqlProjectStore(ProjectStore):
+    """SQLAlchemy asyncio backend (SQLite via aiosqlite locally, any async URL in general).
+
+    One pooled engine per store; the table is created on first use.
+    """
+
+    def __init__(self, url: str, pool_size: int = 5):
+        from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        kwargs = {"pool_pre_ping": True}
+        if not url.startswith("sqlite"):
+            kwargs["pool_size"] = pool_size
+        self.engine = create_async_engine(url, **kwargs)
+        self.metadata = MetaData()
+        self.table = Table(
+            "projects", self.metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("user_id", String, nullable=True),
+            Column("code", String, nullable=False),
+            Column("name", String, nullable=False),
+            Column("location_lat", Float, nullable=True),
+            Column("location_lng", Float, nullable=True),
+            Column("budget_cr", Float, nullable=True),
+            Column("status", String, nullable=True),
+            Column("risk", String, nullable=True),
+            Column("delay_months", Float, nullable=True),
+            Index("ix_projects_user_id_id", "user_id", "id"),
+        )
+        self.dependencies = Table(
+            "project_dependencies", self.metadata,
+            Column("upstream", String, primary_key=True),
+            Column("downstream", String, primary_key=True),
+            Column("weight", Float, nullable=False),
+            Column("slack_months", Float, nullable=False),
+            Index("ix_project_dependencies_downstream", "downstream"),
+        )
+        self.dependency_nodes = Table(
+            "project_dependency_nodes", self.metadata,
+            Column("project_id", String, primary_key=True),
+            Column("delay_months", Float, nullable=False),
+            Column("overrun_cr", Float, nullable=False),
+        )
+        self._ready = False
+        self._ready_lock = asyncio.Lock()
+
+    async def _ensure_schema(self):
+        if self._ready:
+            return
+        async with self._ready_lock:
+            if not self._ready:
+                async with self.engine.begin() as conn:
+                    await conn.run_sync(self.metadata.create_all)
+                self._ready = True
+
+    async def list_projects(self, user_id=None, after_id=None, limit=None, columns=None):
+        from sqlalchemy import select
+
+        await self._ensure_schema()
+        t = self.table
+        cols = [t.c[c] for c in columns] if columns else list(t.c)
+        stmt = select(*cols)
+        if user_id:
+            stmt = stmt.where(t.c.user_id == user_id)
+        if after_id is not None:
+            stmt = stmt.where(t.c.id > after_id)
+        stmt = stmt.order_by(t.c.id)
+        if limit:
+            stmt = stmt.limit(limit)
+        async with self.engine.connect() as conn:
+            res = await conn.execute(stmt)
+            return [dict(r) for r in res.mappings()]
+
+    async def insert_project(self, payload):
+        from sqlalchemy import insert
+
+        await self._ensure_schema()
+        t = self.table
+        values = {k: v for k, v in payload.items() if k in t.c and k != "id"}
+        async with self.engine.begin() as conn:
+            res = await conn.execute(insert(t).values(**values).returning(*t.c))
+            return dict(res.mappings().one())
+
+    async def insert_projects(self, payloads):
+        from sqlalchemy import insert
+
+        if not payloads:
+            return 0
+        await self._ensure_schema()
+        t = self.table
+        rows = [{k: v for k, v in p.items() if k in t.c and k != "id"} for p in payloads]
+        async with self.engine.begin() as conn:
+            await conn.execute(insert(t), rows)
+        return len(rows)
+
+    async def _select_all(self, table) -> List[dict]:
+        from sqlalchemy import select
+
+        await self._ensure_schema()
+        async with self.engine.connect() as conn:
+            res = await conn.execute(select(table))
+            return [dict(r) for r in res.mappings()]
+
+    async def _upsert(self, table, rows: Sequence[dict]) -> int:
+        from sqlalchemy import and_, delete, insert
+
+        if not rows:
+            return 0
+        await self._ensure_schema()
+        keys = [c.name for c in table.primary_key.columns]
+        rows = [{c.name: r[c.name] for c in table.c} for r in rows]
+        dialect = self.engine.dialect.name
+        async with self.engine.begin() as conn:
+            if dialect in ("sqlite", "postgresql"):
+                if dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+                stmt = dialect_insert(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=keys,
+                    set_={c.name: stmt.excluded[c.name] for c in table.c if c.name not in keys},
+                )
+                await conn.execute(stmt, rows)
+            else:
+                for r in rows:
+                    await conn.execute(delete(table).where(and_(*(table.c[k] == r[k] for k in keys))))
+                await conn.execute(insert(table), rows)
+        return len(rows)
+
+    async def list_dependencies(self):
+        return await self._select_all(self.dependencies)
+
+    async def upsert_dependencies(self, rows):
+        return await self._upsert(self.dependencies, rows)
+
+    async def delete_dependency(self, upstream, downstream):
+        from sqlalchemy import delete
+
+        await self._ensure_schema()
+        t = self.dependencies
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(t).where(t.c.upstream == upstream, t.c.downstream == downstream))
+
+    async def list_dependency_nodes(self):
+        return await self._select_all(self.dependency_nodes)
+
+    async def upsert_dependency_node(self, row):
+        await self._upsert(self.dependency_nodes, [row])
+
+    async def delete_dependency_node(self, project_id):
+        from sqlalchemy import delete, or_
+
+        await self._ensure_schema()
+        t, n = self.dependencies, self.dependency_nodes
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(t).where(or_(t.c.upstream == project_id, t.c.downstream == project_id)))
+            await conn.execute(delete(n).where(n.c.project_id == project_id))
+
+    async def close(self):
+        await self.engine.dispose()
+
+
+def _default_sqlite_url() -> str:
+    path = Path(__file__).resolve().parent.parent / 'prism.db'
+    return f"sqlite+aiosqlite:///{path}"
+
+
+def project_store_from_env() -> ProjectStore:
+    """PROJECTS_BACKEND=supabase (default) or sql; sql uses DATABASE_URL."""
+    backend = os.getenv('PROJECTS_BACKEND', 'supabase').lower()
+    if backend == 'sql':
+        return SqlProjectStore(
+            os.getenv('DATABASE_URL') or _default_sqlite_url(),
+            pool_size=int(os.getenv('DATABASE_POOL_SIZE', '5')),
+        )
+    if backend == 'supabase':
+        return SupabaseProjectStore()
+    raise ValueError(f"Unknown PROJECTS_BACKEND: {backend}")
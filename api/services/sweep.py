@@ -0,0 +1,106 @@
+from collections import OrderedDict
+import itertools
+import threading
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+# Hard cap on grid points per sweep request (2 axes x 100 steps = 10k).
+MAX_SWEEP_POINTS = 10_000
+
+
+def axis_values(start: float, stop: float, steps: int) -> np.ndarray:
+    """Evenly spaced float32 values, inclusive of both ends."""
+    return np.linspace(start, stop, steps, dtype=np.float32)
+
+
+def build_grid(base: np.ndarray, columns: Sequence[int], values: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Perturbation grid around `base`.
+
+    Returns (coords, x): coords is (n_points, n_axes) with the swept values,
+    x is (n_points, n_features) with base tiled and swept columns replaced.
+    Points are ordered row-major over the axes, so a 2-axis result reshapes
+    to (len(values[0]), len(values[1])).
+    """
+    mesh = np.meshgrid(*values, indexing="ij")
+    coords = np.stack([m.ravel() for m in mesh], axis=1).astype(np.float32)
+    x = np.repeat(base.reshape(1, -1).astype(np.float32), len(coords), axis=0)
+    x[:, list(columns)] = coords
+    return coords, x
+
+
+class SweepCache:
+    """Risk per grid point, grouped by base vector.
+
+    A base is identified by the model fingerprint, which columns are swept
+    and the values of every column that is *not* swept, so moving the
+    swept sliders (or refining the grid) keeps hitting the same entry.
+    Each base keeps at most `max_points_per_base` points (oldest dropped
+    first) and least recently used bases are dropped past `max_bases` or
+    once the cache holds more than `max_points` points in total.
+    """
+
+    def __init__(self, max_bases: int = 256, max_points_per_base: int = 4 * MAX_SWEEP_POINTS,
+                 max_points: int = 50 * MAX_SWEEP_POINTS):
+        self.max_bases = max_bases
+        self.max_points_per_base = max_points_per_base
+        self.max_points = max_points
+        self._bases: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def base_key(fingerprint: str, base: np.ndarray, columns: Sequence[int]) -> tuple:
+        fixed = tuple(float(v) if i not in columns else None for i, v in enumerate(base.astype(np.float32)))
+        return (fingerprint, tuple(columns), fixed)
+
+    def _points(self, key: tuple) -> dict:
+        with self._lock:
+            pts = self._bases.get(key)
+            if pts is None:
+                pts = self._bases[key] = {}
+                while len(self._bases) > self.max_bases:
+                    self._total -= len(self._bases.popitem(last=False)[1])
+            else:
+                self._bases.move_to_end(key)
+            return pts
+
+    def _store(self, key: tuple, pts: dict, new: List[Tuple[tuple, float]]):
+        with self._lock:
+            if self._bases.get(key) is not pts:
+                return  # evicted while we were scoring
+            before = len(pts)
+            pts.update(new)
+            over = len(pts) - self.max_points_per_base
+            if over > 0:
+                for k in list(itertools.islice(pts, over)):
+                    del pts[k]
+            self._total += len(pts) - before
+            while self._total > self.max_points and len(self._bases) > 1:
+                oldest = next(iter(self._bases))
+                if oldest == key:
+                    self._bases.move_to_end(key)
+                    continue
+                self._total -= len(self._bases.pop(oldest))
+
+    def score(self, key: tuple, coords: np.ndarray, x: np.ndarray,
+              predict: Callable[[np.ndarray], np.ndarray]) -> Tuple[np.ndarray, int]:
+        """Risk for every grid row, calling `predict` once on the misses only.
+
+        Returns (risk, n_scored).
+        """
+        pts = self._points(key)
+        keys: List[tuple] = [tuple(c) for c in coords.tolist()]
+        risk = np.empty(len(keys), dtype=np.float64)
+        miss = []
+        for i, k in enumerate(keys):
+            v = pts.get(k)
+            if v is None:
+                miss.append(i)
+            else:
+                risk[i] = v
+        if miss:
+            fresh = np.asarray(predict(x[miss]), dtype=np.float64)
+            risk[miss] = fresh
+            self._store(key, pts, [(keys[i], v) for i, v in zip(miss, fresh.tolist())])
+        return risk, len(miss)
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main as api
+from api.services.batcher import MicroBatcher
+
+
+def _scorer(calls):
+    def score(items):
+        calls.append(list(items))
+        if "bad" in items:
+            raise ValueError("bad row")
+        return [f"{i}!" for i in items]
+    return score
+
+
+async def _submit_all(b: MicroBatcher, items):
+    try:
+        return await asyncio.gather(*(b.submit(i) for i in items), return_exceptions=True)
+    finally:
+        await b.close()
+
+
+def test_flush_by_size():
+    calls = []
+    b = MicroBatcher(_scorer(calls), max_batch=4, max_wait_ms=5000)
+    t = time.perf_counter()
+    out = asyncio.run(_submit_all(b, [str(i) for i in range(8)]))
+    assert time.perf_counter() - t < 2.0  # never waited for the deadline
+    assert out == [f"{i}!" for i in range(8)]
+    assert [len(c) for c in calls] == [4, 4]
+    assert b.stats()["mean_batch"] == 4.0
+
+
+def test_flush_by_wait():
+    calls = []
+    b = MicroBatcher(_scorer(calls), max_batch=100, max_wait_ms=30)
+    t = time.perf_counter()
+    out = asyncio.run(_submit_all(b, ["a", "b", "c"]))
+    assert time.perf_counter() - t >= 0.025
+    assert out == ["a!", "b!", "c!"]
+    assert calls == [["a", "b", "c"]]
+
+
+def test_failing_row_does_not_fail_the_batch():
+    calls = []
+    b = MicroBatcher(_scorer(calls), max_batch=8, max_wait_ms=50)
+    out = asyncio.run(_submit_all(b, ["a", "b", "bad", "c", "d", "e"]))
+    assert isinstance(out[2], ValueError)
+    assert [o for i, o in enumerate(out) if i != 2] == ["a!", "b!", "c!", "d!", "e!"]
+    # the batch call failed, then every row was retried alone
+    assert calls[0] == ["a", "b", "bad", "c", "d", "e"]
+    assert sorted(map(tuple, calls[1:])) == [(i,) for i in ["a", "b", "bad", "c", "d", "e"]]
+
+
+@pytest.mark.parametrize("value", [1e39, -1e39, "Infinity", "NaN"])
+def test_predict_rejects_values_outside_float32(value):
+    features = dict.fromkeys(api.FEATURE_KEYS, 0.5)
+    features["labour_cost"] = value
+    r = TestClient(api.app).post("/predict", json={"features": features})
+    assert r.status_code == 422
@@ -0,0 +1,65 @@
+import types
+
+import numpy as np
+import pytest
+
+from api.services import cache as cache_mod
+from api.services.cache import LRUCache, quantize, row_keys
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(cache_mod, "time", types.SimpleNamespace(monotonic=lambda: now.t))
+    return now
+
+
+def test_lru_eviction_order():
+    c = LRUCache(max_size=2)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1  # "b" is now least recently used
+    c.put("c", 3)
+    assert c.get("b") is None
+    assert (c.get("a"), c.get("c")) == (1, 3)
+    s = c.stats()
+    assert (s["size"], s["evictions"], s["hits"], s["misses"]) == (2, 1, 3, 1)
+
+
+def test_ttl_expiry(clock):
+    c = LRUCache(max_size=10, ttl_s=5)
+    c.put("a", 1)
+    clock.t += 4
+    assert c.get("a") == 1
+    clock.t += 2
+    assert c.get("a") is None
+    s = c.stats()
+    assert (s["size"], s["expirations"], s["hits"], s["misses"]) == (0, 1, 1, 1)
+
+
+def test_generation_and_invalidate():
+    c = LRUCache(max_size=10)
+    c.set_generation("fp1")
+    c.put("a", 1)
+    c.set_generation("fp1")
+    assert c.get("a") == 1
+    c.set_generation("fp2")
+    assert c.get("a") is None
+    c.put("b", 2)
+    c.invalidate()
+    assert c.get("b") is None
+    assert c.stats()["invalidations"] == 2
+
+
+def test_disabled_cache_stores_nothing():
+    c = LRUCache(max_size=0)
+    assert not c.enabled
+    c.put("a", 1)
+    assert c.get("a") is None and c.stats()["size"] == 0
+
+
+def test_quantized_rows_share_keys():
+    x = np.array([[0.5001, 0.25], [0.4999, 0.25], [0.6, 0.25]], dtype=np.float32)
+    keys = row_keys(quantize(x, 1e-3))
+    assert keys[0] == keys[1] != keys[2]
+    assert quantize(x, 0) is x
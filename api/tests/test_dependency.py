@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from api.services.dependency import CycleError, DependencyGraph
+
+
+def _cascaded(g: DependencyGraph) -> dict:
+    return {
+        pid: (n["cascaded_delay_months"], n["cascaded_overrun_cr"], n["inherited_delay_months"])
+        for pid, n in ((pid, g.node(pid)) for pid in g.topological_order())
+    }
+
+
+def _assert_consistent(g: DependencyGraph):
+    # cached order respects every edge
+    for pid in g.topological_order():
+        for s in g.node(pid)["downstream"]:
+            assert g._pos[pid] < g._pos[s["project_id"]]
+    assert g.topological_order() == sorted(g.topological_order(), key=g._pos.__getitem__)
+    # incremental results equal a from-scratch pass
+    incremental = _cascaded(g)
+    g.recompute_all()
+    assert _cascaded(g) == pytest.approx(incremental)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_matches_recompute_all(seed):
+    rng = random.Random(seed)
+    ids = [f"P{i}" for i in range(40)]
+    g = DependencyGraph()
+    for _ in range(600):
+        op = rng.random()
+        if op < 0.35:
+            g.set_local(rng.choice(ids), rng.uniform(0, 6), rng.uniform(0, 30))
+        elif op < 0.75:
+            u, v = rng.sample(ids, 2)
+            try:
+                g.add_edge(u, v, weight=rng.uniform(0.2, 1.0), slack_months=rng.uniform(0, 2))
+            except CycleError:
+                pass
+        elif op < 0.9:
+            existing = [(u, d["project_id"]) for u in g.topological_order() for d in g.node(u)["downstream"]]
+            if existing:
+                g.remove_edge(*rng.choice(existing))
+        else:
+            pid = rng.choice(ids)
+            if pid in g:
+                g.remove_node(pid)
+        _assert_consistent(g)
+
+
+def test_bulk_load_matches_incremental():
+    rng = random.Random(7)
+    edges = []
+    for i in range(1, 200):
+        for j in rng.sample(range(max(0, i - 20), i), min(2, i)):
+            edges.append((f"P{j}", f"P{i}", rng.uniform(0.3, 0.9), rng.uniform(0, 3)))
+    rng.shuffle(edges)
+    locals_ = {f"P{i}": (rng.uniform(0, 6), rng.uniform(0, 30)) for i in range(200)}
+
+    bulk, incr = DependencyGraph(), DependencyGraph()
+    for g in (bulk, incr):
+        for pid, (d, o) in locals_.items():
+            g.set_local(pid, d, o)
+    bulk.add_edges(edges)
+    for u, v, w, s in edges:
+        incr.add_edge(u, v, w, s)
+
+    _assert_consistent(bulk)
+    _assert_consistent(incr)
+    assert _cascaded(bulk) == pytest.approx(_cascaded(incr))
+
+
+def test_add_edges_rollback_drops_created_nodes():
+    g = DependencyGraph()
+    g.set_local("A", 2.0, 10.0)
+    g.add_edge("A", "B", weight=1.0)
+    before = (len(g), g.edges, g.topological_order(), dict(g._pos), g._next_pos, _cascaded(g))
+
+    with pytest.raises(CycleError):
+        g.add_edges([("B", "C", 1.0, 0.0), ("C", "D", 1.0, 0.0), ("D", "A", 1.0, 0.0)])
+    with pytest.raises(CycleError):
+        g.add_edges([("A", "E", 1.0, 0.0), ("E", "E", 1.0, 0.0)])
+
+    assert (len(g), g.edges, g.topological_order(), dict(g._pos), g._next_pos, _cascaded(g)) == before
+    assert "C" not in g and "D" not in g and "E" not in g
+    g.add_edge("B", "C")
+    _assert_consistent(g)
+
+
+def test_set_locals_matches_one_by_one():
+    rng = random.Random(11)
+    ids = [f"P{i}" for i in range(100)]
+    bulk, single = DependencyGraph(), DependencyGraph()
+    edges = [(ids[j], ids[i], rng.uniform(0.3, 0.9), rng.uniform(0, 1))
+             for i in range(1, 100) for j in rng.sample(range(max(0, i - 10), i), min(2, i))]
+    for g in (bulk, single):
+        g.add_edges(edges)
+    updates = [(rng.choice(ids), rng.uniform(0, 6), rng.uniform(0, 30)) for _ in range(60)]
+
+    touched = bulk.set_locals(updates)
+    one_by_one = sum(single.set_local(*u) for u in updates)
+
+    assert _cascaded(bulk) == pytest.approx(_cascaded(single))
+    _assert_consistent(bulk)
+    # one propagation pass never re-evaluates a node twice
+    assert touched <= len(bulk) < one_by_one
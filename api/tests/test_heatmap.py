@@ -0,0 +1,121 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main as api
+from api.services.heatmap import MAX_PRECISION, SpatialIndex, geohash_bounds, geohash_encode
+from api.services.storage import SqlProjectStore
+
+
+def _rows(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "location_lat": rng.uniform(8, 34),
+            "location_lng": rng.uniform(69, 95),
+            "budget_cr": rng.uniform(1, 100),
+            "risk": rng.choice(["Low", "Medium", "High", None]),
+            "delay_months": rng.choice([None, rng.uniform(0, 12)]),
+        }
+        for i in range(n)
+    ]
+
+
+def _all_cells(index: SpatialIndex, approx: bool = False) -> dict:
+    wrap = pytest.approx if approx else dict
+    return {
+        p: {c["geohash"]: wrap(c) for c in index.cells(p)}
+        for p in range(1, MAX_PRECISION + 1)
+    }
+
+
+def test_geohash_roundtrip():
+    gh = geohash_encode(12.9716, 77.5946, 6)
+    assert gh.startswith("tdr1")
+    lat0, lng0, lat1, lng1 = geohash_bounds(gh)
+    assert lat0 <= 12.9716 <= lat1 and lng0 <= 77.5946 <= lng1
+
+
+def test_moves_and_rescores_match_fresh_load():
+    rng = random.Random(1)
+    rows = _rows(300)
+    live = SpatialIndex()
+    live.load(rows)
+    final = {r["id"]: dict(r) for r in rows}
+    scores = {}
+    for _ in range(500):
+        pid = rng.randrange(len(rows))
+        if rng.random() < 0.5:
+            row = dict(final[pid], location_lat=rng.uniform(8, 34), location_lng=rng.uniform(69, 95),
+                       budget_cr=rng.uniform(1, 100))
+            final[pid] = row
+            live.upsert_project(row)
+        else:
+            scores[pid] = (rng.random(), rng.uniform(0, 12))
+            live.record_score(pid, *scores[pid])
+
+    fresh = SpatialIndex()
+    fresh.load(final.values())
+    for pid, (risk, delay) in scores.items():
+        fresh.record_score(pid, risk, delay)
+    assert _all_cells(live) == _all_cells(fresh, approx=True)
+
+
+def test_rescore_beats_stored_label():
+    index = SpatialIndex()
+    index.load([{"id": 1, "location_lat": 20.0, "location_lng": 80.0, "risk": "High", "delay_months": 9.0}])
+    index.record_score(1, 0.1, 1.0)
+    index.upsert_project({"id": 1, "location_lat": 20.0, "location_lng": 80.0, "risk": "High", "delay_months": 9.0})
+    (cell,) = index.cells(MAX_PRECISION)
+    assert cell["mean_risk_prob"] == pytest.approx(0.1)
+    assert cell["mean_delay_months"] == pytest.approx(1.0)
+
+
+def test_bbox_keeps_overlapping_cells():
+    rows = _rows(50)
+    index = SpatialIndex()
+    index.load(rows)
+    # precision-1 cell "t" is centred at lng 67.5, west of the box
+    cells = {c["geohash"]: c for c in index.cells(1, (6.0, 69.0, 36.0, 97.0))}
+    assert cells["t"]["count"] == sum(r["location_lng"] < 90 for r in rows) > 0
+    assert sum(c["count"] for c in cells.values()) == 50
+    assert index.cells(1, (-40.0, -80.0, -10.0, -40.0)) == []
+
+
+@pytest.fixture
+def sql_store(tmp_path, monkeypatch):
+    store = SqlProjectStore(f"sqlite+aiosqlite:///{tmp_path / 'heatmap.db'}")
+    monkeypatch.setattr(api, "PROJECT_STORE", store)
+    monkeypatch.setattr(api, "HEATMAP", SpatialIndex())
+    monkeypatch.setattr(api, "_heatmap_after_id", None)
+    monkeypatch.setattr(api, "_heatmap_refreshed_at", None)
+    return store
+
+
+def _project(i: int) -> dict:
+    return {"code": f"P{i}", "name": f"Project {i}", "location_lat": 20.0, "location_lng": 80.0,
+            "budget_cr": 1.0, "risk": "Low"}
+
+
+def test_refresh_reads_only_new_projects(sql_store):
+    with TestClient(api.app) as c:
+        c.portal.call(sql_store.insert_projects, [_project(i) for i in range(5)])
+        assert c.get("/heatmap", params={"precision": 1}).json()["cells"][0]["count"] == 5
+        index = api.HEATMAP
+
+        # rows written through another worker, then the refresh interval passes
+        c.portal.call(sql_store.insert_projects, [_project(i) for i in range(5, 8)])
+        api._heatmap_refreshed_at = None
+        seen = []
+        iter_projects = sql_store.iter_projects
+
+        def spy(*args, **kwargs):
+            seen.append(kwargs.get("after_id"))
+            return iter_projects(*args, **kwargs)
+
+        sql_store.iter_projects = spy
+        assert c.get("/heatmap", params={"precision": 1}).json()["cells"][0]["count"] == 8
+        assert seen == [5]
+        assert api.HEATMAP is index  # updated in place, never rebuilt
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main as api
+from api.services.sweep import SweepCache, axis_values, build_grid
+
+
+def _predict(calls):
+    def predict(x):
+        calls.append(len(x))
+        return x.sum(axis=1)
+    return predict
+
+
+def _sweep(cache, base, columns, values, predict):
+    coords, x = build_grid(base, columns, values)
+    key = SweepCache.base_key("fp", base, columns)
+    return cache.score(key, coords, x, predict)
+
+
+def test_refined_sweep_scores_only_new_points():
+    cache, calls = SweepCache(), []
+    base = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+    coarse = [axis_values(0, 1, 3), axis_values(0, 1, 3)]
+    risk, scored = _sweep(cache, base, [0, 2], coarse, _predict(calls))
+    assert scored == 9 and calls == [9]
+
+    # 0, .5, 1 are already cached on both axes; 5x5 adds 16 points
+    fine = [axis_values(0, 1, 5), axis_values(0, 1, 5)]
+    risk, scored = _sweep(cache, base, [0, 2], fine, _predict(calls))
+    assert scored == 16 and calls == [9, 16]
+    coords, x = build_grid(base, [0, 2], fine)
+    assert risk == pytest.approx(x.sum(axis=1))
+
+    # moving a swept slider keeps the base; moving a fixed one does not
+    moved = base.copy()
+    moved[0] = 0.9
+    assert _sweep(cache, moved, [0, 2], fine, _predict(calls))[1] == 0
+    moved[1] = 0.9
+    assert _sweep(cache, moved, [0, 2], fine, _predict(calls))[1] == 25
+
+
+def test_sweep_cache_bounds():
+    cache = SweepCache(max_bases=3, max_points_per_base=10, max_points=25)
+    for b in range(5):
+        base = np.array([0.0, float(b)], dtype=np.float32)
+        _sweep(cache, base, [0], [axis_values(0, 1, 8)], _predict([]))
+        _sweep(cache, base, [0], [axis_values(0, 1, 7)], _predict([]))
+        assert all(len(p) <= 10 for p in cache._bases.values())
+        assert cache._total == sum(len(p) for p in cache._bases.values()) <= 25
+    assert len(cache._bases) <= 3
+
+
+@pytest.mark.parametrize("shap_at", [[[5]], [[0, 0]], [[0]] * (api.MAX_SWEEP_SHAP + 1)])
+def test_shap_at_rejected_before_scoring(shap_at):
+    api.SWEEP_CACHE = SweepCache()
+    r = TestClient(api.app).post("/what-if/sweep", json={
+        "features": dict.fromkeys(api.FEATURE_KEYS, 0.5),
+        "axes": [{"feature": "material_cost", "steps": 5}],
+        "shap_at": shap_at,
+    })
+    assert r.status_code == 422
+    assert not api.SWEEP_CACHE._bases